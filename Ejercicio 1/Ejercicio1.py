@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 import os
+import time
+import argparse
 
 # Paso 1: Leer archivo CSV desde la misma carpeta del script
 def cargar_datos():
@@ -14,64 +16,216 @@ def cargar_datos():
         print(f"❌ Error: No se encontró el archivo '{ruta_csv}'. Verifica que exista y la ruta esté bien escrita.")
         exit()
 
-# Paso 2: Función de aptitud
-def calcular_aptitud(df, offset):
-    df_adjusted = df.copy()
+# Paso 2: Extraer las notas numéricas una sola vez como matriz NumPy
+def preparar_notas(df):
+    # Solo columnas numéricas (evita 'StudentID')
+    cols_numericas = df.select_dtypes(include=[np.number]).columns
+    notas = df[cols_numericas].to_numpy(dtype=float)
+    return notas, cols_numericas
 
-    # Aplicar offset solo a las columnas numéricas (evita 'StudentID')
-    cols_numericas = df_adjusted.select_dtypes(include=[np.number]).columns
-    df_adjusted[cols_numericas] = df_adjusted[cols_numericas] + offset
-    df_adjusted[cols_numericas] = df_adjusted[cols_numericas].clip(lower=0, upper=20)
+# Paso 3: Evaluar un vector de offsets candidatos en una sola pasada
+def evaluar_offsets(notas, offsets, por_curso=False):
+    # por_curso=False -> offsets es una lista de escalares, uno por candidato
+    # por_curso=True  -> offsets es una matriz (candidatos x cursos)
+    offsets = np.asarray(offsets, dtype=float)
+    if por_curso:
+        offsets = np.atleast_2d(offsets)
+    else:
+        offsets = offsets.reshape(-1, 1)
 
-    promedio_general = df_adjusted[cols_numericas].mean().mean()
-    total_alumnos = len(df_adjusted)
+    # Broadcast: (candidatos, alumnos, cursos), recortado a [0, 20]
+    ajustadas = np.clip(notas[np.newaxis, :, :] + offsets[:, np.newaxis, :], 0, 20)
 
-    promedios_alumno = df_adjusted[cols_numericas].mean(axis=1)
-    aprobados = (promedios_alumno >= 11).sum()
-    porcentaje_aprobados = aprobados / total_alumnos
+    promedio_general = ajustadas.mean(axis=1).mean(axis=1)
+    promedios_alumno = ajustadas.mean(axis=2)
+    porcentaje_aprobados = (promedios_alumno >= 11).sum(axis=1) / notas.shape[0]
 
     # Penalización si promedio > 14
-    if promedio_general > 14:
-        return porcentaje_aprobados - (promedio_general - 14) * 0.1
+    penalizacion = np.where(promedio_general > 14, (promedio_general - 14) * 0.1, 0.0)
+    return porcentaje_aprobados - penalizacion
+
+# Paso 4: Índice de estadísticas suficientes (consultas O(log n) por offset)
+def _comprimir(valores, conteos=None):
+    # Valores únicos ordenados con su frecuencia
+    unicos, inversa = np.unique(valores, return_inverse=True)
+    if conteos is None:
+        conteos = np.ones(len(valores))
+    return unicos, np.bincount(inversa.ravel(), weights=conteos, minlength=len(unicos))
+
+def _umbrales_aprobacion(notas):
+    # Offset mínimo con el que cada alumno alcanza promedio >= 11.
+    # La suma recortada del alumno es lineal por tramos y creciente en el offset,
+    # con quiebres en -nota y 20 - nota: se ubica el tramo que cruza 11 * cursos.
+    objetivo = 11 * notas.shape[1]
+    quiebres = np.sort(np.concatenate([-notas, 20 - notas], axis=1), axis=1)
+    sumas = np.clip(notas[:, np.newaxis, :] + quiebres[:, :, np.newaxis], 0, 20).sum(axis=2)
+
+    k = np.argmax(sumas >= objetivo, axis=1)  # siempre k >= 1
+    filas = np.arange(notas.shape[0])
+    b0, b1 = quiebres[filas, k - 1], quiebres[filas, k]
+    s0, s1 = sumas[filas, k - 1], sumas[filas, k]
+    pendiente = (s1 - s0) / (b1 - b0)
+    return np.where(s1 == objetivo, b1, b0 + (objetivo - s0) / pendiente)
+
+def _acumular_indice(parcial, notas):
+    # Agrega un bloque de alumnos a las estadísticas comprimidas
+    celdas = _comprimir(notas.ravel())
+    umbrales = _comprimir(_umbrales_aprobacion(notas))
+    if parcial is None:
+        return {"celdas": celdas, "umbrales": umbrales, "n_alumnos": notas.shape[0]}
+    return {
+        "celdas": _comprimir(np.concatenate([parcial["celdas"][0], celdas[0]]),
+                             np.concatenate([parcial["celdas"][1], celdas[1]])),
+        "umbrales": _comprimir(np.concatenate([parcial["umbrales"][0], umbrales[0]]),
+                               np.concatenate([parcial["umbrales"][1], umbrales[1]])),
+        "n_alumnos": parcial["n_alumnos"] + notas.shape[0],
+    }
+
+def _finalizar_indice(parcial):
+    valores, conteos = parcial["celdas"]
+    umbrales, aprobados = parcial["umbrales"]
+    return {
+        "valores": valores,
+        "conteo_acum": np.concatenate([[0], np.cumsum(conteos)]),
+        "suma_acum": np.concatenate([[0], np.cumsum(valores * conteos)]),
+        "umbrales": umbrales,
+        "aprobados_acum": np.concatenate([[0], np.cumsum(aprobados)]),
+        "n_alumnos": parcial["n_alumnos"],
+        "n_celdas": conteos.sum(),
+    }
+
+def construir_indice(df):
+    notas, _ = preparar_notas(df)
+    return _finalizar_indice(_acumular_indice(None, notas))
+
+def columnas_numericas_csv(ruta_csv, tamano_bloque=100_000):
+    # Columnas numéricas en todo el archivo, igual que select_dtypes sobre el CSV completo:
+    # basta un valor no numérico (p. ej. "7er") en cualquier bloque para descartar la columna
+    columnas = None
+    for bloque in pd.read_csv(ruta_csv, chunksize=tamano_bloque):
+        numericas = list(bloque.select_dtypes(include=[np.number]).columns)
+        columnas = numericas if columnas is None else [c for c in columnas if c in numericas]
+    return columnas or []
+
+def construir_indice_csv(ruta_csv, tamano_bloque=100_000):
+    # Lectura por bloques: nunca se mantiene el archivo completo en memoria.
+    # Primera pasada para fijar las columnas; así todos los bloques usan el mismo conjunto
+    columnas = columnas_numericas_csv(ruta_csv, tamano_bloque)
+    parcial = None
+    for bloque in pd.read_csv(ruta_csv, usecols=columnas, chunksize=tamano_bloque):
+        notas = bloque[columnas].to_numpy(dtype=float)
+        parcial = _acumular_indice(parcial, notas)
+    return _finalizar_indice(parcial)
+
+def verificar_indice_csv(df, ruta_csv, tamano_bloque=100_000, offsets=np.arange(-5, 5.5, 0.5)):
+    # El índice por bloques debe dar la misma aptitud que la evaluación en memoria
+    notas, _ = preparar_notas(df)
+    esperado = evaluar_offsets(notas, offsets)
+    obtenido = aptitud_indice(construir_indice_csv(ruta_csv, tamano_bloque), offsets)
+    if not np.allclose(obtenido, esperado, rtol=0, atol=1e-12):
+        diferencia = np.abs(obtenido - esperado).max()
+        raise ValueError(f"❌ El índice por bloques difiere de la evaluación en memoria (máx. {diferencia:.3g})")
+    return True
+
+def aptitud_indice(indice, offsets):
+    # Acepta un offset escalar o un arreglo de offsets (barrido a cualquier resolución)
+    o = np.asarray(offsets, dtype=float)
+    valores = indice["valores"]
+    conteo_acum, suma_acum = indice["conteo_acum"], indice["suma_acum"]
+    n_celdas = indice["n_celdas"]
+
+    # Celdas con nota + o <= 0 aportan 0; con nota + o >= 20 aportan 20
+    bajo = np.searchsorted(valores, -o, side="right")
+    alto = np.searchsorted(valores, 20 - o, side="left")
+    suma = (suma_acum[alto] - suma_acum[bajo]) + o * (conteo_acum[alto] - conteo_acum[bajo]) \
+        + 20 * (n_celdas - conteo_acum[alto])
+    promedio_general = suma / n_celdas
+
+    aprobados = indice["aprobados_acum"][np.searchsorted(indice["umbrales"], o, side="right")]
+    porcentaje_aprobados = aprobados / indice["n_alumnos"]
+
+    # Penalización si promedio > 14
+    aptitud = porcentaje_aprobados - np.where(promedio_general > 14, (promedio_general - 14) * 0.1, 0.0)
+    return aptitud if np.ndim(offsets) > 0 else float(aptitud)
+
+# Paso 5: Función de aptitud (offset escalar o vector por curso)
+def calcular_aptitud(df, offset):
+    # df puede ser el DataFrame o un índice ya construido (solo offsets escalares)
+    if isinstance(df, dict):
+        return aptitud_indice(df, offset)
+    notas, _ = preparar_notas(df)
+    por_curso = np.ndim(offset) > 0
+    return float(evaluar_offsets(notas, [offset], por_curso=por_curso)[0])
+
+# Paso 6: Hill Climbing
+def hill_climbing(df, por_curso=False, telemetria=None):
+    # telemetria: objeto Telemetria (ver telemetria.py en la raíz) con minimizar=False,
+    # porque la aptitud se maximiza; con None no se mide nada
+    notas, _ = preparar_notas(df)
+    n_cursos = notas.shape[1]
+
+    # Offsets escalares: consultas O(log n) sobre el índice construido una vez
+    if por_curso:
+        evaluar = lambda candidatos: evaluar_offsets(notas, candidatos, por_curso=True)
     else:
-        return porcentaje_aprobados
+        indice = _finalizar_indice(_acumular_indice(None, notas))
+        evaluar = lambda candidatos: aptitud_indice(indice, candidatos)
 
-# Paso 3: Hill Climbing
-def hill_climbing(df):
-    mejor_offset = 0
-    mejor_aptitud = calcular_aptitud(df, mejor_offset)
+    mejor_offset = np.zeros(n_cursos) if por_curso else 0
+    mejor_aptitud = evaluar([mejor_offset])[0]
     cambios = [-0.5, 0.5]
     iteraciones = 0
 
     while True:
+        if telemetria is not None:
+            t0 = time.perf_counter()
+        # Generar todos los vecinos dentro de [-5, 5]
+        if por_curso:
+            vecinos = []
+            for curso in range(n_cursos):
+                for cambio in cambios:
+                    vecino = mejor_offset.copy()
+                    vecino[curso] += cambio
+                    vecinos.append(vecino)
+            vecinos = [v for v in vecinos if np.all((-5 <= v) & (v <= 5))]
+        else:
+            vecinos = [mejor_offset + cambio for cambio in cambios if -5 <= mejor_offset + cambio <= 5]
+
+        if telemetria is not None:
+            t1 = time.perf_counter()
+            telemetria.vecino(t1 - t0)
+
         mejoras = False
-        for cambio in cambios:
-            nuevo_offset = mejor_offset + cambio
-            if -5 <= nuevo_offset <= 5:
-                nueva_aptitud = calcular_aptitud(df, nuevo_offset)
-                if nueva_aptitud > mejor_aptitud:
-                    mejor_offset = nuevo_offset
-                    mejor_aptitud = nueva_aptitud
-                    mejoras = True
-                    break
+        if vecinos:
+            aptitudes = evaluar(vecinos)
+            if telemetria is not None:
+                telemetria.fitness(time.perf_counter() - t1, len(vecinos))
+            # Primera mejora en el mismo orden en que se generaron los vecinos
+            mejores = np.flatnonzero(aptitudes > mejor_aptitud)
+            if mejores.size > 0:
+                mejor_offset = vecinos[mejores[0]]
+                mejor_aptitud = aptitudes[mejores[0]]
+                mejoras = True
         iteraciones += 1
+        if telemetria is not None:
+            telemetria.iteracion(float(mejor_aptitud), float(mejor_aptitud), int(mejoras), len(vecinos))
         if not mejoras or iteraciones > 100:
             break
 
-    return mejor_offset, mejor_aptitud
+    return mejor_offset, float(mejor_aptitud)
 
-# Paso 4: Aplicar y mostrar resultados
+# Paso 7: Aplicar y mostrar resultados
 def aplicar_offset(df, offset):
-    df_final = df.copy()
-    cols_numericas = df_final.select_dtypes(include=[np.number]).columns
+    notas, cols_numericas = preparar_notas(df)
+    ajustadas = np.clip(notas + np.asarray(offset, dtype=float), 0, 20)
 
-    df_final[cols_numericas] = df_final[cols_numericas] + offset
-    df_final[cols_numericas] = df_final[cols_numericas].clip(lower=0, upper=20)
+    df_final = df.copy()
+    df_final[cols_numericas] = ajustadas
 
     print("\n🎯 Offset óptimo encontrado:", offset)
-    print("📊 Nuevo promedio general:", round(df_final[cols_numericas].mean().mean(), 2))
+    print("📊 Nuevo promedio general:", round(ajustadas.mean(axis=0).mean(), 2))
 
-    promedios_alumno = df_final[cols_numericas].mean(axis=1)
+    promedios_alumno = ajustadas.mean(axis=1)
     porcentaje_aprobados = (promedios_alumno >= 11).sum() / len(df_final)
     print("✅ Porcentaje de aprobados:", round(porcentaje_aprobados * 100, 2), "%")
     print("\n📝 Distribución de notas ajustadas:")
@@ -80,11 +234,18 @@ def aplicar_offset(df, offset):
     return df_final
 
 # Función principal
-def main():
+def main(verificar=False):
     df = cargar_datos()
     print("📄 Primeras filas del archivo CSV:")
     print(df.head())
 
+    if verificar:
+        # Autoverificación opcional: el índice por bloques debe coincidir con la evaluación en
+        # memoria (bloques chicos a propósito). Relee el CSV, por eso no corre por defecto.
+        ruta_csv = os.path.join(os.path.dirname(os.path.abspath(__file__)), "notas.csv")
+        verificar_indice_csv(df, ruta_csv, tamano_bloque=7)
+        print("✅ Índice por bloques verificado contra la evaluación en memoria")
+
     mejor_offset, _ = hill_climbing(df)
     df_ajustado = aplicar_offset(df, mejor_offset)
 
@@ -95,4 +256,8 @@ def main():
 
 # Ejecutar
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Ajuste de notas con Hill Climbing")
+    parser.add_argument("--verificar", action="store_true",
+                        help="comprobar el índice por bloques del CSV contra la evaluación en memoria")
+    args = parser.parse_args()
+    main(args.verificar)
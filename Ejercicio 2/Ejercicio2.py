@@ -1,6 +1,12 @@
 import pandas as pd
 import random
 import os
+import sys
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_local import Problema, buscar
 
 # Paso 1: Leer archivo CSV desde la misma carpeta del script
 def cargar_datos():
@@ -14,81 +20,189 @@ def cargar_datos():
         print(f"❌ Error: No se encontró el archivo '{ruta_csv}'. Verifica que exista y esté en la misma carpeta que el script.")
         exit()
 
-# Paso 2: Cargar la disponibilidad de los mentores
-df = cargar_datos()
+# Paso 2: Preparar datos (bloques de 'duracion' slots seguidos)
+def calcular_inicios_validos(mascara, n_slots, duracion=2):
+    bloque = mascara
+    for k in range(1, duracion):
+        bloque &= mascara >> k
+    return [j for j in range(n_slots - duracion + 1) if (bloque >> j) & 1]
+
+def preparar_datos(df, duracion=2):
+    horarios = df.columns[1:]  # Slot1 a SlotN
+    disponibilidad = df[horarios].values  # matriz mentores x slots
+
+    # Disponibilidad empaquetada como enteros: bit j = 1 si el mentor puede en el slot j
+    mascaras = [sum(1 << j for j, libre in enumerate(fila) if libre == 1) for fila in disponibilidad]
 
-# Paso 3: Preparar datos
-horarios = df.columns[1:]  # Slot1 a Slot10
-mentores = df['MentorID'].tolist()
-disponibilidad = df[horarios].values  # matriz 20x10
+    return {
+        "horarios": list(horarios),
+        "mentores": df['MentorID'].tolist(),
+        "duracion": duracion,
+        # Tabla precalculada de inicios válidos por mentor
+        "inicios_validos": [calcular_inicios_validos(m, len(horarios), duracion) for m in mascaras],
+    }
 
-# Paso 4: Calcular choques
-def calcular_choques(asignacion):
-    contador_slots = [0] * len(horarios)
+# Paso 3: Calcular choques
+def calcular_choques(asignacion, datos):
+    contador_slots = [0] * len(datos["horarios"])
     for slot_inicio in asignacion:
         if slot_inicio != -1:
-            contador_slots[slot_inicio] += 1
-            contador_slots[slot_inicio + 1] += 1
+            for slot in range(slot_inicio, slot_inicio + datos["duracion"]):
+                contador_slots[slot] += 1
     choques = sum(1 for count in contador_slots if count > 1)
     return choques
 
+# Paso 4: Estado compacto con ocupación por slot (evaluación incremental)
+def crear_estado(asignacion, datos):
+    duracion = datos["duracion"]
+    ocupacion = [0] * len(datos["horarios"])
+    for slot_inicio in asignacion:
+        if slot_inicio != -1:
+            for slot in range(slot_inicio, slot_inicio + duracion):
+                ocupacion[slot] += 1
+    choques = sum(1 for count in ocupacion if count > 1)
+    return {"asignacion": list(asignacion), "ocupacion": ocupacion, "choques": choques, "duracion": duracion}
+
+def delta_mover(estado, mentor, nuevo_inicio):
+    # Variación de choques si el mentor pasa a nuevo_inicio, sin modificar el estado
+    actual = estado["asignacion"][mentor]
+    ocupacion = estado["ocupacion"]
+    duracion = estado["duracion"]
+    quitados = set() if actual == -1 else set(range(actual, actual + duracion))
+    agregados = set(range(nuevo_inicio, nuevo_inicio + duracion))
+    delta = 0
+    for slot in quitados - agregados:
+        if ocupacion[slot] == 2:
+            delta -= 1
+    for slot in agregados - quitados:
+        if ocupacion[slot] == 1:
+            delta += 1
+    return delta
+
+def aplicar_mover(estado, mentor, nuevo_inicio, delta):
+    actual = estado["asignacion"][mentor]
+    ocupacion = estado["ocupacion"]
+    duracion = estado["duracion"]
+    if actual != -1:
+        for slot in range(actual, actual + duracion):
+            ocupacion[slot] -= 1
+    for slot in range(nuevo_inicio, nuevo_inicio + duracion):
+        ocupacion[slot] += 1
+    estado["asignacion"][mentor] = nuevo_inicio
+    estado["choques"] += delta
+
 # Paso 5: Generar solución aleatoria válida
-def generar_solucion_valida():
+def generar_solucion_valida(datos, rng=random):
     asignacion = []
-    for i in range(len(mentores)):
-        posibles = []
-        for j in range(len(horarios) - 1):
-            if disponibilidad[i][j] == 1 and disponibilidad[i][j + 1] == 1:
-                posibles.append(j)
+    for posibles in datos["inicios_validos"]:
         if posibles:
-            asignacion.append(random.choice(posibles))
+            asignacion.append(rng.choice(posibles))
         else:
             asignacion.append(-1)  # no se encontró bloque válido
     return asignacion
 
 # Paso 6: Vecindario
-def generar_vecino(solucion_actual):
+def generar_vecino(solucion_actual, datos, rng=random):
     nuevo = solucion_actual[:]
-    mentor = random.randint(0, len(mentores) - 1)
-    posibles = []
-    for j in range(len(horarios) - 1):
-        if disponibilidad[mentor][j] == 1 and disponibilidad[mentor][j + 1] == 1:
-            posibles.append(j)
+    mentor = rng.randint(0, len(datos["mentores"]) - 1)
+    posibles = datos["inicios_validos"][mentor]
     if posibles:
-        nuevo[mentor] = random.choice(posibles)
+        nuevo[mentor] = rng.choice(posibles)
     return nuevo
 
-# Paso 7: Algoritmo Hill Climbing
-def hill_climbing(max_iter=1000):
-    actual = generar_solucion_valida()
-    if -1 in actual:
-        print("⚠️ Hay mentores sin bloques disponibles de 2h seguidas. Revisa la disponibilidad.")
-        return actual, calcular_choques(actual)
+# Paso 7: Algoritmo Hill Climbing (movimientos evaluados en O(1))
+class ProblemaMentores(Problema):
+    # Mover un mentor a otro inicio válido; el costo son los choques
+    def __init__(self, datos):
+        self.datos = datos
+
+    def inicial(self, rng):
+        return crear_estado(generar_solucion_valida(self.datos, rng), self.datos)
+
+    def costo(self, estado):
+        return estado["choques"]
 
-    mejor = actual
-    costo_mejor = calcular_choques(mejor)
+    def proponer(self, estado, rng):
+        inicios_validos = self.datos["inicios_validos"]
+        mentor = rng.randrange(len(inicios_validos))
+        return mentor, rng.choice(inicios_validos[mentor])
 
-    for _ in range(max_iter):
-        vecino = generar_vecino(mejor)
-        costo_vecino = calcular_choques(vecino)
+    def delta(self, estado, movimiento):
+        return delta_mover(estado, *movimiento)
 
-        if costo_vecino < costo_mejor:
-            mejor = vecino
-            costo_mejor = costo_vecino
+    def aplicar(self, estado, movimiento, delta):
+        aplicar_mover(estado, *movimiento, delta)
 
-        if costo_mejor == 0:
-            break
+    def copiar(self, estado):
+        return list(estado["asignacion"])
 
-    return mejor, costo_mejor
+def hill_climbing(datos, max_iter=1000, semilla=None, detener=None, cada=256, **opciones):
+    # 'detener' es un evento compartido: se consulta cada 'cada' iteraciones.
+    # Un 'rng' recibido en opciones tiene prioridad sobre 'semilla'
+    opciones.setdefault("rng", random.Random(semilla))
+    opciones.setdefault("costo_objetivo", 0)
+    if any(not posibles for posibles in datos["inicios_validos"]):
+        actual = generar_solucion_valida(datos, opciones["rng"])
+        print(f"⚠️ Hay mentores sin bloques disponibles de {datos['duracion']}h seguidas. Revisa la disponibilidad.")
+        return actual, calcular_choques(actual, datos)
 
-# Paso 8: Ejecutar y mostrar resultados
-asignacion_final, choques_finales = hill_climbing()
+    asignacion, choques, _ = buscar(ProblemaMentores(datos), max_iter=max_iter,
+                                    detener=detener.is_set if detener is not None else None,
+                                    cada=cada, **opciones)
+    return asignacion, choques
 
-print("\n🧠 Asignación final de bloques de 2h por mentor (slot inicial):")
-for i, slot in enumerate(asignacion_final):
-    if slot != -1:
-        print(f"Mentor {mentores[i]}: Slot {slot + 1} y {slot + 2}")
-    else:
-        print(f"Mentor {mentores[i]}: ❌ No se pudo asignar bloque válido")
+# Paso 8: Reinicios múltiples en paralelo
+_datos_trabajador = None
+_detener_trabajador = None
+
+def _iniciar_trabajador(datos, detener):
+    global _datos_trabajador, _detener_trabajador
+    _datos_trabajador = datos
+    _detener_trabajador = detener
+
+def _reinicio_trabajador(semilla, max_iter):
+    asignacion, choques = hill_climbing(_datos_trabajador, max_iter, semilla, _detener_trabajador)
+    if choques == 0:
+        _detener_trabajador.set()  # avisar al resto de procesos
+    return asignacion, choques
+
+def ejecutar_reinicios(datos, n_reinicios=8, max_iter=1000, procesos=None, semilla=None):
+    if any(not posibles for posibles in datos["inicios_validos"]):
+        return hill_climbing(datos, max_iter, semilla)
+
+    semillas = [None if semilla is None else semilla + i for i in range(n_reinicios)]
+    detener = mp.Event()
+    mejor, mejor_choques = None, float('inf')
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                             initargs=(datos, detener)) as pool:
+        futuros = [pool.submit(_reinicio_trabajador, s, max_iter) for s in semillas]
+        for futuro in as_completed(futuros):
+            asignacion, choques = futuro.result()
+            if choques < mejor_choques:
+                mejor, mejor_choques = asignacion, choques
+            if mejor_choques == 0:
+                # Cancelar los reinicios que aún no empezaron
+                for pendiente in futuros:
+                    pendiente.cancel()
+                break
+
+    return mejor, mejor_choques
+
+# Paso 9: Ejecutar y mostrar resultados
+if __name__ == "__main__":
+    df = cargar_datos()
+    datos = preparar_datos(df, duracion=2)
+    mentores = datos["mentores"]
+    duracion = datos["duracion"]
+
+    asignacion_final, choques_finales = ejecutar_reinicios(datos, n_reinicios=8, max_iter=1000)
+
+    print(f"\n🧠 Asignación final de bloques de {duracion}h por mentor (slot inicial):")
+    for i, slot in enumerate(asignacion_final):
+        if slot != -1:
+            print(f"Mentor {mentores[i]}: Slot {slot + 1} a {slot + duracion}")
+        else:
+            print(f"Mentor {mentores[i]}: ❌ No se pudo asignar bloque válido")
 
-print(f"\n🔧 Choques totales: {choques_finales}")
+    print(f"\n🔧 Choques totales: {choques_finales}")
@@ -1,6 +1,12 @@
 import pandas as pd
+import numpy as np
 import random
 import os
+import sys
+from collections import OrderedDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_local import Problema, buscar
 
 # Paso 1: Leer archivo CSV desde la misma carpeta del script
 def cargar_matriz_distancias():
@@ -14,7 +20,74 @@ def cargar_matriz_distancias():
         print(f"❌ Error: No se encontró el archivo '{ruta_csv}'. Verifica que exista y esté en la misma carpeta que el script.")
         exit()
 
-# Paso 2: Calcular distancia total de una ruta
+# Paso 1b: Fuentes de distancias para instancias grandes
+class DistanciasLazy:
+    # Distancias euclidianas calculadas bajo demanda desde coordenadas, con caché LRU acotada.
+    # Se indexa igual que la matriz densa: D[a, b] o D[arreglo_a, arreglo_b].
+    def __init__(self, coordenadas, etiquetas=None, tam_cache=1_000_000):
+        self.coordenadas = np.asarray(coordenadas, dtype=float)
+        self.etiquetas = etiquetas
+        self.tam_cache = tam_cache
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self.coordenadas)
+
+    def __getitem__(self, clave):
+        a, b = clave
+        if np.ndim(a) or np.ndim(b):
+            diferencia = self.coordenadas[a] - self.coordenadas[b]
+            return np.sqrt((diferencia ** 2).sum(axis=-1))
+
+        par = (a, b) if a <= b else (b, a)
+        distancia = self._cache.get(par)
+        if distancia is None:
+            diferencia = self.coordenadas[par[0]] - self.coordenadas[par[1]]
+            distancia = float(np.sqrt(diferencia @ diferencia))
+            self._cache[par] = distancia
+            if len(self._cache) > self.tam_cache:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(par)
+        return distancia
+
+    def vecinos_cercanos(self, k):
+        # k vecinos más cercanos de cada punto usando un índice espacial (KD-tree)
+        from sklearn.neighbors import KDTree
+        n = len(self)
+        _, indices = KDTree(self.coordenadas).query(self.coordenadas, k=k + 1)
+        # Quitar el propio punto (si hay puntos repetidos puede no venir primero)
+        propio = indices == np.arange(n)[:, np.newaxis]
+        propio[~propio.any(axis=1), -1] = True
+        return indices[~propio].reshape(n, k)
+
+def cargar_coordenadas(ruta_csv, tam_cache=1_000_000):
+    # CSV con columnas: etiqueta, x, y
+    df = pd.read_csv(ruta_csv, index_col=0)
+    return DistanciasLazy(df.to_numpy(dtype=float), list(df.index), tam_cache)
+
+def guardar_matriz_memmap(D, ruta_npy):
+    # Matriz precalculada en float32 sobre disco (la mitad de memoria que float64)
+    salida = np.lib.format.open_memmap(ruta_npy, mode="w+", dtype=np.float32, shape=np.shape(D))
+    salida[:] = D
+    salida.flush()
+    return ruta_npy
+
+def cargar_matriz_memmap(ruta_npy):
+    return np.load(ruta_npy, mmap_mode="r")
+
+# Paso 2: Convertir la matriz a un ndarray indexado por enteros (una sola vez)
+def preparar_matriz(matriz):
+    if not isinstance(matriz, pd.DataFrame):
+        # DistanciasLazy o ndarray / memmap ya indexados por enteros
+        etiquetas = getattr(matriz, "etiquetas", None) or list(range(len(matriz)))
+        return matriz, etiquetas
+    etiquetas = list(matriz.index)
+    # Reordenar columnas igual que las filas para que D[i, j] = distancia(etiqueta i, etiqueta j)
+    D = matriz.loc[etiquetas, etiquetas].to_numpy(dtype=float)
+    return D, etiquetas
+
+# Paso 3: Calcular distancia total de una ruta
 def calcular_distancia_total(ruta, matriz):
     distancia_total = 0
     for i in range(len(ruta) - 1):
@@ -25,35 +98,183 @@ def calcular_distancia_total(ruta, matriz):
     distancia_total += matriz.loc[ruta[-1], ruta[0]]
     return distancia_total
 
-# Paso 3: Generar vecino (intercambio de 2 nodos)
+def distancia_ruta(ruta, D):
+    # Igual que calcular_distancia_total, pero sobre índices enteros
+    ruta = np.asarray(ruta)
+    return float(np.sum(D[ruta, np.roll(ruta, -1)], dtype=float))
+
+# Paso 4: Movimientos con evaluación delta en O(1)
+def delta_swap(ruta, D, i, j):
+    # Intercambiar las posiciones i y j: solo cambian las aristas que las tocan
+    n = len(ruta)
+    aristas = {(i - 1) % n, i, (j - 1) % n, j}
+
+    def nodo(p):
+        p %= n
+        return ruta[j] if p == i else ruta[i] if p == j else ruta[p]
+
+    antes = sum(D[ruta[p], ruta[(p + 1) % n]] for p in aristas)
+    despues = sum(D[nodo(p), nodo(p + 1)] for p in aristas)
+    return despues - antes
+
+def aplicar_swap(ruta, i, j):
+    ruta[i], ruta[j] = ruta[j], ruta[i]
+
+def delta_2opt(ruta, D, i, j):
+    # Invertir el tramo ruta[i+1..j] (i < j, matriz simétrica)
+    n = len(ruta)
+    a, b = ruta[i], ruta[i + 1]
+    c, d = ruta[j], ruta[(j + 1) % n]
+    return D[a, c] + D[b, d] - D[a, b] - D[c, d]
+
+def aplicar_2opt(ruta, i, j):
+    ruta[i + 1:j + 1] = ruta[i + 1:j + 1][::-1]
+
+def delta_oropt(ruta, D, i, largo, p):
+    # Mover el tramo ruta[i..i+largo-1] entre ruta[p] y ruta[p+1] (p fuera del tramo)
+    n = len(ruta)
+    previo, siguiente = ruta[(i - 1) % n], ruta[(i + largo) % n]
+    inicio, fin = ruta[i], ruta[i + largo - 1]
+    x, y = ruta[p], ruta[(p + 1) % n]
+    quitado = D[previo, inicio] + D[fin, siguiente] + D[x, y]
+    agregado = D[previo, siguiente] + D[x, inicio] + D[fin, y]
+    return agregado - quitado
+
+def aplicar_oropt(ruta, i, largo, p):
+    tramo = ruta[i:i + largo]
+    x = ruta[p]
+    del ruta[i:i + largo]
+    destino = ruta.index(x) + 1
+    ruta[destino:destino] = tramo
+
+# Paso 5: Generar vecino (intercambio de 2 nodos) o proponer un movimiento aleatorio
 def generar_vecino(ruta_actual):
     vecino = ruta_actual[:]
     i, j = random.sample(range(len(vecino)), 2)
     vecino[i], vecino[j] = vecino[j], vecino[i]
     return vecino
 
-# Paso 4: Algoritmo Hill Climbing
-def hill_climbing(matriz, max_iter=1000):
-    laboratorios = list(matriz.index)
-    actual = random.sample(laboratorios, len(laboratorios))
-    mejor = actual
-    mejor_distancia = calcular_distancia_total(mejor, matriz)
+def proponer_movimiento(n, movimientos, rng=random):
+    tipo = rng.choice(movimientos)
+    if tipo == "swap":
+        return tipo, tuple(rng.sample(range(n), 2))
+    if tipo == "2opt":
+        i, j = sorted(rng.sample(range(n), 2))
+        return tipo, (i, j)
+    largo = rng.randint(1, min(3, n - 2))
+    i = rng.randint(0, n - largo)
+    tramo = {(i - 1) % n} | set(range(i, i + largo))
+    p = rng.randrange(n)
+    while p in tramo:
+        p = rng.randrange(n)
+    return tipo, (i, largo, p)
+
+DELTAS = {"swap": delta_swap, "2opt": delta_2opt, "oropt": delta_oropt}
+APLICAR = {"swap": aplicar_swap, "2opt": aplicar_2opt, "oropt": aplicar_oropt}
+
+# Paso 6: Búsqueda local 2-opt guiada por listas de vecinos cercanos
+def listas_vecinos(D, k=10, bloque=1024):
+    n = len(D)
+    k = min(k, n - 1)
+    if isinstance(D, DistanciasLazy):
+        return D.vecinos_cercanos(k)
+
+    # Matriz densa (ndarray o memmap): por bloques de filas para no materializar N x N
+    vecinos = np.empty((n, k), dtype=np.int64)
+    for inicio in range(0, n, bloque):
+        fin = min(inicio + bloque, n)
+        filas = np.array(D[inicio:fin], dtype=float)
+        filas[np.arange(fin - inicio), np.arange(inicio, fin)] = np.inf
+        candidatos = np.argpartition(filas, k - 1, axis=1)[:, :k]
+        orden = np.argsort(np.take_along_axis(filas, candidatos, axis=1), axis=1)
+        vecinos[inicio:fin] = np.take_along_axis(candidatos, orden, axis=1)
+    return vecinos
+
+def busqueda_2opt(ruta, D, k=10, max_pasadas=100):
+    n = len(ruta)
+    cercanos = listas_vecinos(D, k)
+    posicion = np.empty(n, dtype=int)
+    posicion[ruta] = np.arange(n)
+
+    for _ in range(max_pasadas):
+        mejora = False
+        for a in range(n):
+            i = posicion[a]
+            b = ruta[(i + 1) % n]
+            for c in cercanos[a]:
+                # Solo vale la pena si la nueva arista (a, c) es más corta que (a, b)
+                if D[a, c] >= D[a, b]:
+                    break
+                lo, hi = sorted((i, posicion[c]))
+                if hi - lo < 2 or (lo == 0 and hi == n - 1):
+                    continue
+                if delta_2opt(ruta, D, lo, hi) < -1e-9:
+                    aplicar_2opt(ruta, lo, hi)
+                    posicion[ruta[lo + 1:hi + 1]] = np.arange(lo + 1, hi + 1)
+                    mejora = True
+                    i = posicion[a]
+                    b = ruta[(i + 1) % n]
+        if not mejora:
+            break
+    return ruta
+
+# Paso 7: Algoritmo Hill Climbing
+class ProblemaRuta(Problema):
+    # Ruta como lista de índices; el costo es la distancia acumulada con los deltas
+    def __init__(self, D, n, movimientos=("swap",)):
+        self.D = D
+        self.n = n
+        self.movimientos = movimientos
 
-    for _ in range(max_iter):
-        vecino = generar_vecino(mejor)
-        distancia_vecino = calcular_distancia_total(vecino, matriz)
-        if distancia_vecino < mejor_distancia:
-            mejor = vecino
-            mejor_distancia = distancia_vecino
+    def inicial(self, rng):
+        ruta = rng.sample(range(self.n), self.n)
+        return {"ruta": ruta, "distancia": distancia_ruta(ruta, self.D)}
 
-    return mejor, mejor_distancia
+    def costo(self, estado):
+        return estado["distancia"]
+
+    def proponer(self, estado, rng):
+        return proponer_movimiento(self.n, self.movimientos, rng)
+
+    def delta(self, estado, movimiento):
+        tipo, params = movimiento
+        delta = DELTAS[tipo](estado["ruta"], self.D, *params)
+        # Diferencias por debajo del redondeo no cuentan como mejora
+        return delta if abs(delta) > 1e-9 else 0.0
+
+    def aplicar(self, estado, movimiento, delta):
+        tipo, params = movimiento
+        APLICAR[tipo](estado["ruta"], *params)
+        estado["distancia"] += delta
+
+    def copiar(self, estado):
+        return estado["ruta"][:]
+
+def hill_climbing(matriz, max_iter=1000, movimientos=("swap",), **opciones):
+    D, laboratorios = preparar_matriz(matriz)
+    n = len(laboratorios)
+    problema = ProblemaRuta(D, n, movimientos)
+    mejor, _, _ = buscar(problema, max_iter=max_iter if n > 3 else 0, **opciones)
+
+    # Recalcular para evitar el error acumulado de las sumas parciales
+    mejor_distancia = distancia_ruta(mejor, D)
+    return [laboratorios[i] for i in mejor], mejor_distancia
 
 # Ejecutar el algoritmo
-matriz_distancias = cargar_matriz_distancias()
-ruta_optima, distancia_total = hill_climbing(matriz_distancias, max_iter=1000)
-
-# Mostrar resultado
-print("\n🚶 Ruta óptima de revisión de laboratorios:")
-for i, lab in enumerate(ruta_optima):
-    print(f"{i+1}. {lab}")
-print(f"\n📏 Distancia total recorrida: {distancia_total:.2f} metros")
+if __name__ == "__main__":
+    matriz_distancias = cargar_matriz_distancias()
+    ruta_optima, distancia_total = hill_climbing(matriz_distancias, max_iter=1000,
+                                                 movimientos=("swap", "2opt", "oropt"))
+
+    # Refinar con 2-opt sobre vecinos cercanos
+    D, etiquetas = preparar_matriz(matriz_distancias)
+    posicion = {lab: i for i, lab in enumerate(etiquetas)}
+    ruta_idx = busqueda_2opt([posicion[lab] for lab in ruta_optima], D)
+    ruta_optima = [etiquetas[i] for i in ruta_idx]
+    distancia_total = distancia_ruta(ruta_idx, D)
+
+    # Mostrar resultado
+    print("\n🚶 Ruta óptima de revisión de laboratorios:")
+    for i, lab in enumerate(ruta_optima):
+        print(f"{i+1}. {lab}")
+    print(f"\n📏 Distancia total recorrida: {distancia_total:.2f} metros")
@@ -1,6 +1,12 @@
 import pandas as pd
+import numpy as np
 import random
+import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_local import Problema, buscar
 
 # Paso 1: Cargar archivo CSV desde la misma carpeta
 def cargar_datos():
@@ -28,19 +34,178 @@ def generar_vecino(bitstring):
     vecino[i] = 1 - vecino[i]
     return vecino
 
-# Paso 4: Algoritmo Hill Climbing
-def hill_climbing(costos, beneficios, presupuesto=10000, iteraciones=1000):
-    actual = [random.randint(0, 1) for _ in range(len(costos))]
-    mejor = actual
-    mejor_fit = fitness(mejor, costos, beneficios, presupuesto)
+# Paso 4: Estado con costo/beneficio acumulados (cada volteo se evalúa en O(1))
+def crear_estado(bitstring, costos, beneficios):
+    bits = np.asarray(bitstring, dtype=np.uint8)
+    return {"bits": bits, "costo": (costos @ bits).item(), "beneficio": (beneficios @ bits).item()}
+
+def evaluar_volteo(estado, i, costos, beneficios, presupuesto):
+    signo = 1 - 2 * int(estado["bits"][i])  # +1 si se agrega el proyecto, -1 si se quita
+    nuevo_costo = estado["costo"] + signo * costos[i].item()
+    nuevo_beneficio = estado["beneficio"] + signo * beneficios[i].item()
+    nuevo_fit = nuevo_beneficio if nuevo_costo <= presupuesto else float('-inf')
+    return nuevo_fit, nuevo_costo, nuevo_beneficio
+
+def aplicar_volteo(estado, i, nuevo_costo, nuevo_beneficio):
+    estado["bits"][i] ^= 1
+    estado["costo"] = nuevo_costo
+    estado["beneficio"] = nuevo_beneficio
+
+# Paso 5: Algoritmo Hill Climbing
+class ProblemaProyectos(Problema):
+    # Voltear un proyecto; el costo es -beneficio (inf si se pasa del presupuesto)
+    def __init__(self, costos, beneficios, presupuesto=10000):
+        self.costos = costos
+        self.beneficios = beneficios
+        self.presupuesto = presupuesto
+
+    def inicial(self, rng):
+        actual = [rng.randint(0, 1) for _ in range(len(self.costos))]
+        return crear_estado(actual, self.costos, self.beneficios)
+
+    def costo(self, estado):
+        return -estado["beneficio"] if estado["costo"] <= self.presupuesto else float('inf')
+
+    def proponer(self, estado, rng):
+        return rng.randint(0, len(self.costos) - 1)
+
+    def delta(self, estado, i):
+        # Desde un estado infactible (inf) a otro infactible queda NaN: el motor no lo acepta
+        vecino_fit, _, _ = evaluar_volteo(estado, i, self.costos, self.beneficios, self.presupuesto)
+        return -vecino_fit - self.costo(estado)
+
+    def aplicar(self, estado, i, delta):
+        _, nuevo_costo, nuevo_beneficio = evaluar_volteo(estado, i, self.costos, self.beneficios, self.presupuesto)
+        aplicar_volteo(estado, i, nuevo_costo, nuevo_beneficio)
+
+    def copiar(self, estado):
+        return estado["bits"].tolist()
+
+def hill_climbing(costos, beneficios, presupuesto=10000, iteraciones=1000, **opciones):
+    problema = ProblemaProyectos(np.asarray(costos), np.asarray(beneficios), presupuesto)
+    mejor, costo, _ = buscar(problema, max_iter=iteraciones, **opciones)
+    return mejor, -costo
+
+# Paso 6: Solución exacta (programación dinámica o branch and bound)
+def _programacion_dinamica(costos, beneficios, presupuesto):
+    # Mochila 0/1 sobre el presupuesto dividido entre el MCD de los costos
+    paso = int(np.gcd.reduce(costos)) or 1
+    c = costos // paso
+    capacidad = int(presupuesto // paso)
+
+    mejor = np.zeros(capacidad + 1)
+    tomar = np.zeros((len(c), capacidad + 1), dtype=bool)
+    for i, (ci, bi) in enumerate(zip(c, beneficios)):
+        if ci > capacidad or bi <= 0:
+            continue
+        candidato = mejor[:capacidad + 1 - ci] + bi
+        mejora = candidato > mejor[ci:]
+        tomar[i, ci:] = mejora
+        mejor[ci:] = np.where(mejora, candidato, mejor[ci:])
+
+    seleccion = np.zeros(len(c), dtype=np.uint8)
+    restante = capacidad
+    for i in range(len(c) - 1, -1, -1):
+        if tomar[i, restante]:
+            seleccion[i] = 1
+            restante -= c[i]
+    return seleccion
+
+def _branch_and_bound(costos, beneficios, presupuesto):
+    # Búsqueda en profundidad con cota de la relajación fraccionaria
+    utiles = np.flatnonzero((beneficios > 0) & (costos <= presupuesto))
+    razon = beneficios[utiles] / np.maximum(costos[utiles], 1e-12)
+    orden = utiles[np.argsort(-razon, kind="stable")]
+    c = costos[orden].astype(float)
+    b = beneficios[orden].astype(float)
+    n = len(orden)
+    costo_acum = np.concatenate([[0.0], np.cumsum(c)])
+    beneficio_acum = np.concatenate([[0.0], np.cumsum(b)])
+
+    def cota(k, capacidad, valor):
+        # Tomar en orden de razón los que entran completos y una fracción del siguiente
+        m = np.searchsorted(costo_acum, costo_acum[k] + capacidad, side="right") - 1
+        m = max(m, k)
+        valor += beneficio_acum[m] - beneficio_acum[k]
+        if m < n:
+            valor += b[m] * (capacidad - (costo_acum[m] - costo_acum[k])) / c[m]
+        return valor
+
+    mejor_valor, mejor_elegidos = 0.0, None
+    pila = [(0, float(presupuesto), 0.0, None)]
+    while pila:
+        k, capacidad, valor, elegidos = pila.pop()
+        if valor > mejor_valor:
+            mejor_valor, mejor_elegidos = valor, elegidos
+        if k == n or cota(k, capacidad, valor) <= mejor_valor + 1e-9:
+            continue
+        pila.append((k + 1, capacidad, valor, elegidos))  # excluir el proyecto k
+        if c[k] <= capacidad:
+            pila.append((k + 1, capacidad - c[k], valor + b[k], (k, elegidos)))  # incluirlo
+
+    seleccion = np.zeros(len(costos), dtype=np.uint8)
+    while mejor_elegidos is not None:
+        k, mejor_elegidos = mejor_elegidos
+        seleccion[orden[k]] = 1
+    return seleccion
+
+def resolver_exacto(costos, beneficios, presupuesto=10000, max_celdas=50_000_000):
+    costos = np.asarray(costos)
+    beneficios = np.asarray(beneficios)
+
+    # DP solo si los costos son enteros y la tabla proyectos x presupuesto es manejable
+    enteros = np.issubdtype(costos.dtype, np.integer) and np.all(costos >= 0)
+    if enteros:
+        paso = int(np.gcd.reduce(costos)) or 1
+        enteros = len(costos) * (presupuesto // paso + 1) <= max_celdas
+    if enteros:
+        seleccion = _programacion_dinamica(costos, beneficios, presupuesto)
+    else:
+        seleccion = _branch_and_bound(costos, beneficios, presupuesto)
+    return seleccion.tolist(), (beneficios @ seleccion).item()
+
+# Paso 7: Cientos de escaladores en lote, avanzando al mismo paso
+def hill_climbing_lote(costos, beneficios, presupuesto=10000, n_escaladores=200, iteraciones=1000, semilla=None,
+                       telemetria=None):
+    # telemetria: objeto Telemetria (ver telemetria.py en la raíz) con minimizar=False, porque se
+    # maximiza el beneficio; cada paso cuenta un vecino por escalador
+    rng = np.random.default_rng(semilla)
+    costos = np.asarray(costos)
+    beneficios = np.asarray(beneficios)
+    n = len(costos)
+
+    # Una fila de bits por escalador; costo y beneficio de todos en un solo producto matriz-vector
+    bits = rng.integers(0, 2, size=(n_escaladores, n), dtype=np.uint8)
+    totales = bits @ np.column_stack([costos, beneficios])
+    costo, beneficio = totales[:, 0].copy(), totales[:, 1].copy()
+    fit = np.where(costo <= presupuesto, beneficio, -np.inf)
+    filas = np.arange(n_escaladores)
 
     for _ in range(iteraciones):
-        vecino = generar_vecino(mejor)
-        vecino_fit = fitness(vecino, costos, beneficios, presupuesto)
-        if vecino_fit > mejor_fit:
-            mejor = vecino
-            mejor_fit = vecino_fit
-    return mejor, mejor_fit
+        # Cada escalador voltea un bit al azar; el delta se lee de los vectores de costo/beneficio
+        if telemetria is not None:
+            t0 = time.perf_counter()
+        idx = rng.integers(0, n, size=n_escaladores)
+        if telemetria is not None:
+            t1 = time.perf_counter()
+            telemetria.vecino(t1 - t0)
+        signo = 1 - 2 * bits[filas, idx].astype(np.int64)
+        nuevo_costo = costo + signo * costos[idx]
+        nuevo_beneficio = beneficio + signo * beneficios[idx]
+        nuevo_fit = np.where(nuevo_costo <= presupuesto, nuevo_beneficio, -np.inf)
+        if telemetria is not None:
+            telemetria.fitness(time.perf_counter() - t1, n_escaladores)
+
+        acepta = nuevo_fit > fit
+        bits[filas[acepta], idx[acepta]] ^= 1
+        costo = np.where(acepta, nuevo_costo, costo)
+        beneficio = np.where(acepta, nuevo_beneficio, beneficio)
+        fit = np.where(acepta, nuevo_fit, fit)
+        if telemetria is not None:
+            telemetria.iteracion(fit.max().item(), nuevo_fit.max().item(), int(acepta.sum()), n_escaladores)
+
+    mejor = int(np.argmax(fit))
+    return bits[mejor].tolist(), fit[mejor].item()
 
 def main():
     df = cargar_datos()
@@ -59,5 +224,11 @@ def main():
     print(f"\n📊 Costo total:     S/ {costo_total}")
     print(f"🏆 Beneficio total: S/ {beneficio_total}")
 
+    _, beneficio_optimo = resolver_exacto(costos, beneficios)
+    print(f"📐 Óptimo exacto:   S/ {beneficio_optimo}")
+
+    _, beneficio_lote = hill_climbing_lote(costos, beneficios)
+    print(f"🧗 Mejor de 200 escaladores en lote: S/ {beneficio_lote}")
+
 if __name__ == "__main__":
     main()
@@ -2,6 +2,10 @@ import pandas as pd
 import numpy as np
 import random
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_local import Problema, buscar
 
 # Paso 1: Leer archivo CSV desde la misma carpeta del script
 def cargar_datos():
@@ -15,34 +19,64 @@ def cargar_datos():
         print(f"❌ Error: No se encontró el archivo '{ruta_csv}'. Verifica que exista.")
         exit()
 
-# Paso 2: Asignación secuencial inicial (heurística)
-def asignacion_inicial(df):
-    franjas = [f"F{i+1}" for i in range(6)]
+# Paso 2: Asignación inicial voraz consciente de conflictos
+def obtener_franjas(df):
+    # Columnas F1, F2, ..., FN del encabezado, ordenadas por número
+    franjas = [c for c in df.columns if c.startswith("F") and c[1:].isdigit()]
+    return sorted(franjas, key=lambda f: int(f[1:]))
+
+def asignacion_inicial(df, n_salas=6, max_por_sala=4):
+    franjas = obtener_franjas(df)
+    n_franjas = len(franjas)
+    tesistas = df['TesistaID'].tolist()
+    disponibilidad = df[franjas].to_numpy() == 1
+
+    ocupado = np.zeros((n_salas, n_franjas), dtype=int)
+    n_sala = np.zeros(n_salas, dtype=int)
+    primera = np.full(n_salas, n_franjas)
+    ultima = np.full(n_salas, -1)
+    posiciones = np.arange(n_franjas)[np.newaxis, :]
+
     solucion = {}
-    sala_actual = 0
-    franja_actual = 0
-    for _, row in df.iterrows():
-        while not row[franjas[franja_actual]]:
-            franja_actual = (franja_actual + 1) % 6
-            sala_actual = (sala_actual + (franja_actual == 0)) % 6
-        solucion[row['TesistaID']] = (sala_actual, franjas[franja_actual])
-        franja_actual = (franja_actual + 1) % 6
-        sala_actual = (sala_actual + (franja_actual == 0)) % 6
-    return solucion
+    # Primero los tesistas con menos franjas disponibles (los más restringidos)
+    for t in np.argsort(disponibilidad.sum(axis=1), kind="stable"):
+        disponible = disponibilidad[t] if disponibilidad[t].any() else np.ones(n_franjas, dtype=bool)
+
+        # Huecos que agrega cada (sala, franja): fuera del rango usado los abre, dentro los cierra
+        vacia = (n_sala == 0)[:, np.newaxis]
+        lo, hi = primera[:, np.newaxis], ultima[:, np.newaxis]
+        nuevos_huecos = np.where(posiciones < lo, lo - posiciones - 1,
+                                 np.where(posiciones > hi, posiciones - hi - 1, -1))
+        costo = np.where(vacia, 1, 2 * nuevos_huecos)  # a igual costo, preferir salas ya usadas
+
+        libre = (ocupado == 0) & disponible[np.newaxis, :] & (n_sala < max_por_sala)[:, np.newaxis]
+        if not libre.any():
+            # Sin celda libre: el menor número de solapamientos posible
+            libre = np.broadcast_to(disponible[np.newaxis, :], ocupado.shape)
+            costo = ocupado + 1000 * (n_sala == max_por_sala)[:, np.newaxis]
+
+        sala, f = divmod(int(np.argmin(np.where(libre, costo, np.iinfo(int).max))), n_franjas)
+        ocupado[sala, f] += 1
+        n_sala[sala] += 1
+        primera[sala] = min(primera[sala], f)
+        ultima[sala] = max(ultima[sala], f)
+        solucion[tesistas[t]] = (sala, franjas[f])
+
+    return {tesista: solucion[tesista] for tesista in tesistas}
 
 # Paso 3: Función de evaluación
 def evaluar(solucion):
     uso_salas = {}
     solapamientos = 0
-    franjas_por_sala = {sala: [] for sala in range(6)}
-    
+    franjas_por_sala = {}
+
     for tesista, (sala, franja) in solucion.items():
         clave = (sala, franja)
         if clave in uso_salas:
             solapamientos += 1
         else:
             uso_salas[clave] = tesista
-        franjas_por_sala[sala].append(int(franja[1]))  # Extraer número de franja
+        franjas_por_sala.setdefault(sala, []).append(int(franja[1:]))  # Extraer número de franja
 
     huecos = 0
     for franjas in franjas_por_sala.values():
@@ -60,29 +94,159 @@ def evaluar(solucion):
     return -(solapamientos + huecos), solapamientos, huecos
 
 # Paso 4: Generar vecino
-def generar_vecino(solucion, df):
+def generar_vecino(solucion, df, n_salas=6):
     vecino = solucion.copy()
     tesista_random = random.choice(list(solucion.keys()))
     row = df[df['TesistaID'] == tesista_random].iloc[0]
-    franjas = [f"F{j+1}" for j in range(6)]
-    opciones_validas = [(sala, franja) for sala in range(6) for franja in franjas if row[franja] == 1]
+    franjas = obtener_franjas(df)
+    opciones_validas = [(sala, franja) for sala in range(n_salas) for franja in franjas if row[franja] == 1]
     if opciones_validas:
         vecino[tesista_random] = random.choice(opciones_validas)
     return vecino
 
-# Paso 5: Hill Climbing
-def hill_climbing(df, iteraciones=1000):
-    solucion_actual = asignacion_inicial(df)
-    mejor_score, _, _ = evaluar(solucion_actual)
-    for _ in range(iteraciones):
-        vecino = generar_vecino(solucion_actual, df)
-        score, _, _ = evaluar(vecino)
-        if score > mejor_score:
-            solucion_actual = vecino
-            mejor_score = score
-    return solucion_actual, evaluar(solucion_actual)
-
-# Paso 6: Guardar calendario
+# Paso 5: Estado compacto por índices (evaluación incremental)
+def preparar_opciones(df, n_salas=6):
+    franjas = obtener_franjas(df)
+    disponibilidad = df[franjas].to_numpy() == 1  # matriz tesistas x franjas
+    # Opciones válidas (sala, franja) por tesista, calculadas una sola vez
+    opciones = [
+        [(sala, int(f)) for sala in range(n_salas) for f in np.flatnonzero(fila)]
+        for fila in disponibilidad
+    ]
+    return {"tesistas": df['TesistaID'].tolist(), "franjas": franjas, "n_salas": n_salas, "opciones": opciones}
+
+def costo_sala(n, mascara):
+    # (solapamientos, huecos) de una sala con n tesistas y franjas ocupadas según 'mascara'
+    if n == 0:
+        return 0, 0
+    distintas = bin(mascara).count("1")
+    primera = (mascara & -mascara).bit_length() - 1
+    ultima = mascara.bit_length() - 1
+    huecos = (ultima - primera + 1) - distintas
+    # Penalización si excede 4 franjas usadas
+    if n > 4:
+        huecos += 1000
+    return n - distintas, huecos
+
+def crear_estado(solucion, datos):
+    indice_franja = {f: j for j, f in enumerate(datos["franjas"])}
+    n_salas = datos["n_salas"]
+    estado = {
+        "sala": [],
+        "franja": [],
+        "conteo": [[0] * len(datos["franjas"]) for _ in range(n_salas)],
+        "n": [0] * n_salas,
+        "mascara": [0] * n_salas,  # bitset de franjas ocupadas por sala
+    }
+    for tesista in datos["tesistas"]:
+        sala, franja = solucion[tesista]
+        j = indice_franja[franja]
+        estado["sala"].append(sala)
+        estado["franja"].append(j)
+        estado["conteo"][sala][j] += 1
+        estado["n"][sala] += 1
+        estado["mascara"][sala] |= 1 << j
+
+    costos = [costo_sala(estado["n"][s], estado["mascara"][s]) for s in range(n_salas)]
+    estado["solapamientos"] = sum(c[0] for c in costos)
+    estado["huecos"] = sum(c[1] for c in costos)
+    return estado
+
+def delta_mover(estado, t, sala_nueva, franja_nueva):
+    # Variación de (solapamientos, huecos) si el tesista t pasa a (sala_nueva, franja_nueva)
+    sala, franja = estado["sala"][t], estado["franja"][t]
+    if (sala, franja) == (sala_nueva, franja_nueva):
+        return 0, 0
+    n, mascara = estado["n"], estado["mascara"]
+
+    nuevos = {}
+    mascara_sin = mascara[sala] if estado["conteo"][sala][franja] > 1 else mascara[sala] & ~(1 << franja)
+    nuevos[sala] = (n[sala] - 1, mascara_sin)
+    n_dest, mascara_dest = nuevos.get(sala_nueva, (n[sala_nueva], mascara[sala_nueva]))
+    nuevos[sala_nueva] = (n_dest + 1, mascara_dest | (1 << franja_nueva))
+
+    d_solap = d_huecos = 0
+    for s, (n_s, mascara_s) in nuevos.items():
+        antes = costo_sala(n[s], mascara[s])
+        despues = costo_sala(n_s, mascara_s)
+        d_solap += despues[0] - antes[0]
+        d_huecos += despues[1] - antes[1]
+    return d_solap, d_huecos
+
+def aplicar_mover(estado, t, sala_nueva, franja_nueva, d_solap, d_huecos):
+    sala, franja = estado["sala"][t], estado["franja"][t]
+    estado["conteo"][sala][franja] -= 1
+    estado["n"][sala] -= 1
+    if estado["conteo"][sala][franja] == 0:
+        estado["mascara"][sala] &= ~(1 << franja)
+
+    estado["conteo"][sala_nueva][franja_nueva] += 1
+    estado["n"][sala_nueva] += 1
+    estado["mascara"][sala_nueva] |= 1 << franja_nueva
+    estado["sala"][t], estado["franja"][t] = sala_nueva, franja_nueva
+    estado["solapamientos"] += d_solap
+    estado["huecos"] += d_huecos
+
+def asignacion_aleatoria(datos, rng):
+    # Cada tesista en una (sala, franja) válida al azar; sin disponibilidad, cualquiera
+    solucion = {}
+    for tesista, opciones in zip(datos["tesistas"], datos["opciones"]):
+        if opciones:
+            sala, j = rng.choice(opciones)
+        else:
+            sala, j = rng.randrange(datos["n_salas"]), rng.randrange(len(datos["franjas"]))
+        solucion[tesista] = (sala, datos["franjas"][j])
+    return solucion
+
+def estado_a_solucion(estado, datos):
+    return {
+        tesista: (estado["sala"][t], datos["franjas"][estado["franja"][t]])
+        for t, tesista in enumerate(datos["tesistas"])
+    }
+
+# Paso 6: Hill Climbing
+class ProblemaSalas(Problema):
+    # Mover un tesista a otra (sala, franja); el costo es solapamientos + huecos
+    def __init__(self, datos, inicial):
+        self.datos = datos
+        self.solucion_inicial = inicial
+
+    def inicial(self, rng):
+        # La asignación voraz solo en el primer reinicio; los siguientes parten al azar
+        solucion, self.solucion_inicial = self.solucion_inicial, None
+        if solucion is None:
+            solucion = asignacion_aleatoria(self.datos, rng)
+        return crear_estado(solucion, self.datos)
+
+    def costo(self, estado):
+        return estado["solapamientos"] + estado["huecos"]
+
+    def proponer(self, estado, rng):
+        opciones = self.datos["opciones"]
+        t = rng.randrange(len(opciones))
+        if not opciones[t]:
+            return None
+        return (t,) + rng.choice(opciones[t])
+
+    def delta(self, estado, movimiento):
+        return sum(delta_mover(estado, *movimiento))
+
+    def aplicar(self, estado, movimiento, delta):
+        aplicar_mover(estado, *movimiento, *delta_mover(estado, *movimiento))
+
+    def copiar(self, estado):
+        return {"sala": estado["sala"][:], "franja": estado["franja"][:],
+                "solapamientos": estado["solapamientos"], "huecos": estado["huecos"]}
+
+def hill_climbing(df, iteraciones=1000, n_salas=6, **opciones):
+    datos = preparar_opciones(df, n_salas)
+    problema = ProblemaSalas(datos, asignacion_inicial(df, n_salas))
+    mejor, _, _ = buscar(problema, max_iter=iteraciones, **opciones)
+
+    solapamientos, huecos = mejor["solapamientos"], mejor["huecos"]
+    return estado_a_solucion(mejor, datos), (-(solapamientos + huecos), solapamientos, huecos)
+
+# Paso 7: Guardar calendario
 def guardar_calendario(solucion):
     df = pd.DataFrame([
         {"TesistaID": tesista, "Sala": sala + 1, "Franja": franja}
@@ -1,6 +1,12 @@
 import os
+import sys
 import pandas as pd
+import numpy as np
 import random
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_local import Problema, buscar
 
 # Paso 1: Cargar datos desde la misma carpeta del script
 def cargar_datos():
@@ -31,37 +37,253 @@ def vecino(solucion):
     vecino[i] = 1 - vecino[i]
     return vecino
 
-# Paso 4: Algoritmo Hill Climbing
-def hill_climbing(df, iteraciones=1000):
-    actual = [random.randint(0, 1) for _ in range(len(df))]
-    mejor_aptitud = evaluar(actual, df)
-    
-    for _ in range(iteraciones):
-        nuevo = vecino(actual)
-        aptitud_nuevo = evaluar(nuevo, df)
-        if aptitud_nuevo > mejor_aptitud:
-            actual = nuevo
-            mejor_aptitud = aptitud_nuevo
-    
-    return actual, mejor_aptitud
-
-# Paso 5: Ejecutar
-df = cargar_datos()
-mejor_solucion, mejor_valor = hill_climbing(df)
-
-# Paso 6: Mostrar resultados
-print("\n📘 Preguntas seleccionadas para el examen:")
-preguntas = []
-tiempo_total = 0
-dificultad_total = 0
-for i, bit in enumerate(mejor_solucion):
-    if bit == 1:
-        fila = df.iloc[i]
-        preguntas.append(fila['QuestionID'])
-        tiempo_total += fila['Time_min']
-        dificultad_total += fila['Difficulty']
-        print(f" - {fila['QuestionID']} (Dif: {fila['Difficulty']}, Tiempo: {fila['Time_min']} min)")
-
-print(f"\n📊 Total de preguntas: {len(preguntas)}")
-print(f"🕒 Tiempo total: {tiempo_total} min")
-print(f"🔥 Dificultad total: {dificultad_total}")
+# Paso 4: Estado con totales acumulados (cada volteo se evalúa en O(1))
+def preparar_datos(df):
+    return df['Time_min'].to_numpy(), df['Difficulty'].to_numpy()
+
+def violacion(tiempo, dificultad, max_tiempo=90, dif_min=180, dif_max=200):
+    # Distancia a la región factible (0 si cumple todas las restricciones)
+    return max(0, tiempo - max_tiempo) + max(0, dif_min - dificultad) + max(0, dificultad - dif_max)
+
+def crear_indices(bits):
+    # Preguntas elegidas y libres en listas, con la posición de cada pregunta en su lista
+    elegidas = [int(i) for i in np.flatnonzero(bits == 1)]
+    libres = [int(i) for i in np.flatnonzero(bits == 0)]
+    posicion = [0] * len(bits)
+    for lista in (elegidas, libres):
+        for p, i in enumerate(lista):
+            posicion[i] = p
+    return {"elegidas": elegidas, "libres": libres, "posicion": posicion}
+
+def mover_indice(indices, i, elegir):
+    # Pasa la pregunta i a la otra lista en O(1): su lugar lo ocupa el último de la lista
+    origen, destino = (indices["libres"], indices["elegidas"]) if elegir else (indices["elegidas"], indices["libres"])
+    posicion = indices["posicion"]
+    ultimo = origen.pop()
+    if ultimo != i:
+        origen[posicion[i]] = ultimo
+        posicion[ultimo] = posicion[i]
+    posicion[i] = len(destino)
+    destino.append(i)
+
+def proponer_volteo(indices, tiempo, dificultad, tiempos, dificultades, max_tiempo=90, dif_min=180, dif_max=200,
+                    intentos=32, rng=random):
+    # Solo volteos que pueden acercar a la región factible o mejorar dentro de ella.
+    # Se muestrea en O(1) desde las listas de elegidas/libres (sin recorrer todas las preguntas)
+    n = len(indices["posicion"])
+    if tiempo > max_tiempo or dificultad > dif_max:
+        elegidas = indices["elegidas"]  # quitar preguntas
+        if elegidas:
+            return elegidas[rng.randrange(len(elegidas))]
+        return rng.randint(0, n - 1)
+
+    # agregar preguntas que entran en el tiempo restante (y sin pasarse de dificultad si ya es factible):
+    # muestreo por rechazo entre las libres, con un número acotado de intentos
+    libres = indices["libres"]
+    for _ in range(intentos if libres else 0):
+        i = libres[rng.randrange(len(libres))]
+        if tiempos[i] <= max_tiempo - tiempo and (dificultad < dif_min or dificultades[i] <= dif_max - dificultad):
+            return i
+    return rng.randint(0, n - 1)
+
+# Paso 5: Tabla exacta (programación dinámica) reutilizable entre consultas
+def construir_tabla(df, dif_tope=None):
+    # min_tiempo[D] = menor tiempo total de un examen con dificultad exactamente D.
+    # Es la frontera de Pareto de la tabla de alcanzabilidad (tiempo, dificultad).
+    tiempos, dificultades = preparar_datos(df)
+    if dif_tope is None:
+        dif_tope = int(dificultades.sum())
+    infinito = np.iinfo(np.int64).max // 2
+
+    min_tiempo = np.full(dif_tope + 1, infinito, dtype=np.int64)
+    min_tiempo[0] = 0
+    tomar = np.zeros((len(tiempos), dif_tope + 1), dtype=bool)
+    for i, (t, d) in enumerate(zip(tiempos, dificultades)):
+        if d > dif_tope:
+            continue
+        candidato = min_tiempo[:dif_tope + 1 - d] + t
+        mejora = candidato < min_tiempo[d:]
+        tomar[i, d:] = mejora
+        min_tiempo[d:] = np.where(mejora, candidato, min_tiempo[d:])
+
+    return {"min_tiempo": min_tiempo, "tomar": tomar, "dificultades": dificultades}
+
+def consultar_tabla(tabla, max_tiempo=90, dif_min=180, dif_max=200):
+    # Mejor examen (máxima dificultad) dentro del tiempo y del rango de dificultad
+    min_tiempo = tabla["min_tiempo"]
+    dif_max = min(dif_max, len(min_tiempo) - 1)
+    if dif_min > dif_max:
+        return None, float('-inf')
+    posibles = np.flatnonzero(min_tiempo[dif_min:dif_max + 1] <= max_tiempo)
+    if posibles.size == 0:
+        return None, float('-inf')
+
+    mejor = dif_min + int(posibles[-1])
+    # Reconstruir las preguntas elegidas recorriendo la tabla hacia atrás
+    bits = [0] * len(tabla["dificultades"])
+    restante = mejor
+    for i in range(len(bits) - 1, -1, -1):
+        if tabla["tomar"][i, restante]:
+            bits[i] = 1
+            restante -= tabla["dificultades"][i].item()
+    return bits, mejor
+
+# Paso 6: Algoritmo Hill Climbing (opcionalmente desde una solución inicial)
+class ProblemaExamen(Problema):
+    # Se compara primero la violación (menor es mejor) y luego la dificultad:
+    # costo = violación * peso - dificultad, con un peso mayor que cualquier dificultad posible
+    def __init__(self, tiempos, dificultades, limites, inicial=None):
+        self.tiempos = tiempos
+        self.dificultades = dificultades
+        self.limites = limites
+        self.solucion_inicial = inicial
+        self.peso = int(dificultades.sum()) + 1
+
+    def inicial(self, rng):
+        # La solución recibida solo en el primer reinicio; los siguientes parten al azar
+        inicial, self.solucion_inicial = self.solucion_inicial, None
+        if inicial is None:
+            inicial = [rng.randint(0, 1) for _ in range(len(self.tiempos))]
+        bits = np.array(inicial, dtype=np.uint8)
+        return {"bits": bits, "indices": crear_indices(bits),
+                "tiempo": (self.tiempos @ bits).item(), "dificultad": (self.dificultades @ bits).item()}
+
+    def _costo(self, tiempo, dificultad):
+        return violacion(tiempo, dificultad, *self.limites) * self.peso - dificultad
+
+    def costo(self, estado):
+        return self._costo(estado["tiempo"], estado["dificultad"])
+
+    def proponer(self, estado, rng):
+        return proponer_volteo(estado["indices"], estado["tiempo"], estado["dificultad"],
+                               self.tiempos, self.dificultades, *self.limites, rng=rng)
+
+    def _volteo(self, estado, i):
+        signo = 1 - 2 * int(estado["bits"][i])
+        return (estado["tiempo"] + signo * self.tiempos[i].item(),
+                estado["dificultad"] + signo * self.dificultades[i].item())
+
+    def delta(self, estado, i):
+        return self._costo(*self._volteo(estado, i)) - self.costo(estado)
+
+    def aplicar(self, estado, i, delta):
+        estado["tiempo"], estado["dificultad"] = self._volteo(estado, i)
+        estado["bits"][i] ^= 1
+        mover_indice(estado["indices"], i, elegir=bool(estado["bits"][i]))
+
+    def copiar(self, estado):
+        return {"bits": estado["bits"].tolist(), "tiempo": estado["tiempo"], "dificultad": estado["dificultad"]}
+
+def hill_climbing_estadisticas(df, iteraciones=1000, max_tiempo=90, dif_min=180, dif_max=200, inicial=None,
+                               **opciones):
+    # Igual que hill_climbing, pero también devuelve las estadísticas del motor
+    tiempos, dificultades = preparar_datos(df)
+    limites = (max_tiempo, dif_min, dif_max)
+    mejor, _, estadisticas = buscar(ProblemaExamen(tiempos, dificultades, limites, inicial), max_iter=iteraciones,
+                                    **opciones)
+
+    factible = violacion(mejor["tiempo"], mejor["dificultad"], *limites) == 0
+    mejor_aptitud = mejor["dificultad"] if factible else float('-inf')
+    return mejor["bits"], mejor_aptitud, estadisticas
+
+def hill_climbing(df, iteraciones=1000, max_tiempo=90, dif_min=180, dif_max=200, inicial=None, **opciones):
+    bits, aptitud, _ = hill_climbing_estadisticas(df, iteraciones, max_tiempo, dif_min, dif_max, inicial, **opciones)
+    return bits, aptitud
+
+# Paso 7: Generar K exámenes distintos en paralelo (resultados a medida que llegan)
+_df_trabajador = None
+
+def _iniciar_trabajador(df):
+    global _df_trabajador
+    _df_trabajador = df
+
+def _examen_trabajador(semilla, iteraciones, limites):
+    return hill_climbing_estadisticas(_df_trabajador, iteraciones, *limites, rng=random.Random(semilla))
+
+def nueva_version(bits, valor, k, min_hamming, vistos, mascaras):
+    # Acepta el examen si es factible, nuevo y a distancia >= min_hamming de los ya aceptados
+    if valor == float('-inf') or len(mascaras) >= k:
+        return False
+    clave = np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+    if clave in vistos:
+        return False
+    vistos.add(clave)
+    mascara = int.from_bytes(clave, "big")
+    if any(bin(mascara ^ m).count("1") < min_hamming for m in mascaras):
+        return False
+    mascaras.append(mascara)
+    return True
+
+def generar_examenes(df, k=10, min_hamming=1, procesos=None, semilla=0, iteraciones=1000,
+                     max_intentos=None, max_tiempo=90, dif_min=180, dif_max=200,
+                     dificultad_objetivo=None, tolerancia=2, telemetria=None):
+    # Todas las versiones deben ser equivalentes: dificultad a lo sumo 'tolerancia' puntos de un
+    # objetivo común (por defecto, la dificultad óptima exacta dentro del rango)
+    # telemetria: objeto Telemetria con minimizar=False; cada escalador terminado es una iteración
+    # (los trabajadores no comparten el objeto: se suman sus estadísticas al recibir el resultado)
+    if dificultad_objetivo is None:
+        _, dificultad_objetivo = consultar_tabla(construir_tabla(df, dif_tope=dif_max), max_tiempo, dif_min, dif_max)
+    if dificultad_objetivo == float('-inf'):
+        return  # ningún examen cumple las restricciones
+    limites = (max_tiempo, max(dif_min, dificultad_objetivo - tolerancia), min(dif_max, dificultad_objetivo + tolerancia))
+    max_intentos = max_intentos or 20 * k
+    vistos = set()    # exámenes ya encontrados, como bits empaquetados
+    mascaras = []     # versiones aceptadas, como enteros para medir Hamming
+    lanzados = 0
+    mejor_valor = float('-inf')
+
+    procesos = procesos or os.cpu_count() or 1
+    en_vuelo = 2 * procesos  # tareas en cola para que ningún proceso quede ocioso
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador, initargs=(df,)) as pool:
+        pendientes = set()
+        try:
+            while len(mascaras) < k and (pendientes or lanzados < max_intentos):
+                while lanzados < max_intentos and len(pendientes) < en_vuelo:
+                    pendientes.add(pool.submit(_examen_trabajador, semilla + lanzados, iteraciones, limites))
+                    lanzados += 1
+                listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    bits, valor, estadisticas = futuro.result()
+                    acepta = nueva_version(bits, valor, k, min_hamming, vistos, mascaras)
+                    if telemetria is not None:
+                        mejor_valor = max(mejor_valor, valor)
+                        telemetria.fitness(estadisticas["segundos"], estadisticas["evaluaciones"])
+                        telemetria.iteracion(mejor_valor, valor, int(acepta))
+                    if acepta:
+                        yield bits, valor
+        finally:
+            for futuro in pendientes:
+                futuro.cancel()
+
+# Paso 8: Ejecutar
+if __name__ == "__main__":
+    df = cargar_datos()
+    tabla = construir_tabla(df)
+    solucion_exacta, valor_exacto = consultar_tabla(tabla)
+    print("📐 Dificultad óptima exacta:", valor_exacto)
+    mejor_solucion, mejor_valor = hill_climbing(df, inicial=solucion_exacta)
+
+    # Paso 9: Mostrar resultados
+    print("\n📘 Preguntas seleccionadas para el examen:")
+    preguntas = []
+    tiempo_total = 0
+    dificultad_total = 0
+    for i, bit in enumerate(mejor_solucion):
+        if bit == 1:
+            fila = df.iloc[i]
+            preguntas.append(fila['QuestionID'])
+            tiempo_total += fila['Time_min']
+            dificultad_total += fila['Difficulty']
+            print(f" - {fila['QuestionID']} (Dif: {fila['Difficulty']}, Tiempo: {fila['Time_min']} min)")
+
+    print(f"\n📊 Total de preguntas: {len(preguntas)}")
+    print(f"🕒 Tiempo total: {tiempo_total} min")
+    print(f"🔥 Dificultad total: {dificultad_total}")
+
+    # Paso 10: Versiones alternativas del examen
+    print(f"\n🧾 Versiones alternativas (dificultad {valor_exacto} ± 2):")
+    for v, (bits, valor) in enumerate(generar_examenes(df, k=5, min_hamming=4, dificultad_objetivo=valor_exacto),
+                                      start=1):
+        ids = [df['QuestionID'][i] for i, bit in enumerate(bits) if bit == 1]
+        print(f" Versión {v} (Dificultad: {valor}): {', '.join(ids)}")
@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
 import random
+import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_local import Problema, buscar
 
 # Cargar CSV desde la ruta del script
 def cargar_datos():
@@ -29,7 +34,8 @@ def calcular_aptitud(equipos, df):
 
     # Penalización: desviación del promedio ideal por habilidad
     habilidades = df['Skill'].unique()
-    ideal_por_equipo = {h: df['Skill'].value_counts()[h] / len(equipos) for h in habilidades}
+    conteo_total = df['Skill'].value_counts()
+    ideal_por_equipo = {h: conteo_total[h] / len(equipos) for h in habilidades}
     penalizacion = 0
     for counts in skill_counts:
         for h in habilidades:
@@ -39,10 +45,10 @@ def calcular_aptitud(equipos, df):
 
     return total_varianza + penalizacion
 
-# Crear una solución inicial aleatoria: 5 equipos de 4
-def generar_solucion_inicial(num_estudiantes=20, num_equipos=5):
+# Crear una solución inicial aleatoria (por defecto 5 equipos de 4)
+def generar_solucion_inicial(num_estudiantes=20, num_equipos=5, rng=random):
     indices = list(range(num_estudiantes))
-    random.shuffle(indices)
+    rng.shuffle(indices)
     equipos = [indices[i::num_equipos] for i in range(num_equipos)]
     return equipos
 
@@ -57,19 +63,184 @@ def generar_vecino(equipos):
     equipos_copia[eq1][idx1], equipos_copia[eq2][idx2] = equipos_copia[eq2][idx2], equipos_copia[eq1][idx1]
     return equipos_copia
 
-# Ejecutar Hill Climbing
-def hill_climbing(df, iteraciones=1000):
-    equipos = generar_solucion_inicial()
-    mejor_aptitud = calcular_aptitud(equipos, df)
+# Estado por equipo: suma y suma de cuadrados de GPA + conteo de cada skill
+def preparar_datos(df, num_equipos=5):
+    codigos, habilidades = pd.factorize(df['Skill'])  # skills codificadas como enteros
+    return {
+        "gpa": df['GPA'].to_numpy(dtype=float),
+        "skill": codigos,
+        "habilidades": habilidades,
+        "ideal": np.bincount(codigos, minlength=len(habilidades)) / num_equipos,
+    }
+
+def varianza(suma, suma_cuad, n):
+    # Igual que np.var (poblacional) a partir de las sumas
+    media = suma / n
+    return suma_cuad / n - media * media
+
+def crear_estado(equipos, datos):
+    gpa, skill = datos["gpa"], datos["skill"]
+    estado = {
+        "equipos": [list(e) for e in equipos],
+        "suma": np.array([gpa[e].sum() for e in equipos]),
+        "suma_cuad": np.array([(gpa[e] ** 2).sum() for e in equipos]),
+        "tam": np.array([len(e) for e in equipos]),
+        "conteos": np.array([np.bincount(skill[e], minlength=len(datos["ideal"])) for e in equipos]),
+    }
+    total_varianza = varianza(estado["suma"], estado["suma_cuad"], estado["tam"]).sum()
+    penalizacion = np.abs(estado["conteos"] - datos["ideal"]).sum()
+    estado["aptitud"] = float(total_varianza + penalizacion)
+    estado["sin_recalcular"] = 0  # intercambios aplicados desde el último recálculo completo
+    return estado
+
+RECALCULAR_CADA = 1000
+
+def recalcular_estado(estado, datos):
+    # Recalcula sumas, conteos y aptitud desde los equipos: corrige el error de redondeo
+    # que acumulan los deltas en corridas largas
+    nuevo = crear_estado(estado["equipos"], datos)
+    for clave in ("suma", "suma_cuad", "conteos", "aptitud", "sin_recalcular"):
+        estado[clave] = nuevo[clave]
+    return estado
+
+def delta_intercambio(estado, datos, eq1, idx1, eq2, idx2):
+    # Variación de la aptitud al intercambiar dos alumnos de equipos distintos, en O(1)
+    a, b = estado["equipos"][eq1][idx1], estado["equipos"][eq2][idx2]
+    ga, gb = datos["gpa"][a], datos["gpa"][b]
+    suma, suma_cuad, tam = estado["suma"], estado["suma_cuad"], estado["tam"]
+
+    delta = 0.0
+    for eq, sale, entra in ((eq1, ga, gb), (eq2, gb, ga)):
+        delta += varianza(suma[eq] - sale + entra, suma_cuad[eq] - sale * sale + entra * entra, tam[eq]) \
+            - varianza(suma[eq], suma_cuad[eq], tam[eq])
+
+    ka, kb = datos["skill"][a], datos["skill"][b]
+    if ka != kb:
+        conteos, ideal = estado["conteos"], datos["ideal"]
+        for eq, k, cambio in ((eq1, ka, -1), (eq1, kb, 1), (eq2, kb, -1), (eq2, ka, 1)):
+            delta += abs(conteos[eq, k] + cambio - ideal[k]) - abs(conteos[eq, k] - ideal[k])
+    return delta
+
+def aplicar_intercambio(estado, datos, eq1, idx1, eq2, idx2, delta):
+    equipos = estado["equipos"]
+    a, b = equipos[eq1][idx1], equipos[eq2][idx2]
+    ga, gb = datos["gpa"][a], datos["gpa"][b]
+    ka, kb = datos["skill"][a], datos["skill"][b]
+
+    estado["suma"][eq1] += gb - ga
+    estado["suma"][eq2] += ga - gb
+    estado["suma_cuad"][eq1] += gb * gb - ga * ga
+    estado["suma_cuad"][eq2] += ga * ga - gb * gb
+    estado["conteos"][eq1, ka] -= 1
+    estado["conteos"][eq1, kb] += 1
+    estado["conteos"][eq2, kb] -= 1
+    estado["conteos"][eq2, ka] += 1
+    equipos[eq1][idx1], equipos[eq2][idx2] = b, a
+    estado["aptitud"] += delta
+    estado["sin_recalcular"] += 1
+    if estado["sin_recalcular"] >= RECALCULAR_CADA:
+        recalcular_estado(estado, datos)
+
+# Descenso más empinado: delta de todos los intercambios entre equipos en una sola operación
+def deltas_todos_intercambios(estado, datos, equipo_de):
+    gpa, skill, ideal = datos["gpa"], datos["skill"], datos["ideal"]
+    suma, suma_cuad, tam = estado["suma"][equipo_de], estado["suma_cuad"][equipo_de], estado["tam"][equipo_de]
+    var_actual = varianza(suma, suma_cuad, tam)
+
+    # Fila = alumno a (equipo p), columna = alumno b (equipo q)
+    g_a, g_b = gpa[:, np.newaxis], gpa[np.newaxis, :]
+    var_p = varianza(suma[:, np.newaxis] - g_a + g_b, suma_cuad[:, np.newaxis] - g_a ** 2 + g_b ** 2, tam[:, np.newaxis])
+    var_q = varianza(suma[np.newaxis, :] - g_b + g_a, suma_cuad[np.newaxis, :] - g_b ** 2 + g_a ** 2, tam[np.newaxis, :])
+    delta = var_p - var_actual[:, np.newaxis] + var_q - var_actual[np.newaxis, :]
+
+    # Cambio de penalización al quitar (-1) o agregar (+1) una skill a un equipo
+    conteos = estado["conteos"]
+    quitar = np.abs(conteos - 1 - ideal) - np.abs(conteos - ideal)
+    agregar = np.abs(conteos + 1 - ideal) - np.abs(conteos - ideal)
+    sale = quitar[equipo_de, skill]
+    penalizacion = sale[:, np.newaxis] + sale[np.newaxis, :] \
+        + agregar[equipo_de[:, np.newaxis], skill[np.newaxis, :]] \
+        + agregar[equipo_de[np.newaxis, :], skill[:, np.newaxis]]
+    delta += np.where(skill[:, np.newaxis] == skill[np.newaxis, :], 0.0, penalizacion)
+
+    # Solo intercambios entre equipos distintos
+    delta[equipo_de[:, np.newaxis] == equipo_de[np.newaxis, :]] = np.inf
+    return delta
+
+def descenso_empinado(estado, datos, max_pasos=1000, telemetria=None):
+    # telemetria: objeto Telemetria (ver telemetria.py en la raíz); cada paso evalúa todos los pares
+    equipo_de = np.empty(len(datos["gpa"]), dtype=int)
+    for eq, miembros in enumerate(estado["equipos"]):
+        equipo_de[miembros] = eq
+
+    for _ in range(max_pasos):
+        if telemetria is not None:
+            t0 = time.perf_counter()
+        deltas = deltas_todos_intercambios(estado, datos, equipo_de)
+        a, b = np.unravel_index(np.argmin(deltas), deltas.shape)
+        if telemetria is not None:
+            telemetria.fitness(time.perf_counter() - t0, deltas.size)
+        if deltas[a, b] >= -1e-12:
+            if telemetria is not None:
+                telemetria.iteracion(estado["aptitud"], estado["aptitud"], 0, deltas.size)
+            break  # óptimo local: ningún intercambio mejora
+        eq1, eq2 = equipo_de[a], equipo_de[b]
+        idx1, idx2 = estado["equipos"][eq1].index(a), estado["equipos"][eq2].index(b)
+        aplicar_intercambio(estado, datos, eq1, idx1, eq2, idx2, deltas[a, b])
+        equipo_de[a], equipo_de[b] = eq2, eq1
+        if telemetria is not None:
+            telemetria.iteracion(estado["aptitud"], estado["aptitud"], 1, deltas.size)
+    return estado
+
+# Ejecutar Hill Climbing (cada intercambio se evalúa en O(1))
+class ProblemaEquipos(Problema):
+    # Intercambiar dos alumnos de equipos distintos; el costo es la aptitud (a minimizar)
+    def __init__(self, datos, num_equipos, equipos=None):
+        self.datos = datos
+        self.num_equipos = num_equipos
+        self.equipos = equipos
+
+    def inicial(self, rng):
+        # Los equipos recibidos (si hay) solo en el primer reinicio; el resto se sortea con rng
+        equipos, self.equipos = self.equipos, None
+        if equipos is None:
+            equipos = generar_solucion_inicial(len(self.datos["gpa"]), self.num_equipos, rng)
+        return crear_estado(equipos, self.datos)
+
+    def costo(self, estado):
+        return estado["aptitud"]
+
+    def proponer(self, estado, rng):
+        eq1, eq2 = rng.sample(range(len(estado["equipos"])), 2)
+        if not estado["equipos"][eq1] or not estado["equipos"][eq2]:
+            return None  # evitar errores
+        idx1 = rng.randint(0, len(estado["equipos"][eq1]) - 1)
+        idx2 = rng.randint(0, len(estado["equipos"][eq2]) - 1)
+        return eq1, idx1, eq2, idx2
+
+    def delta(self, estado, movimiento):
+        delta = delta_intercambio(estado, self.datos, *movimiento)
+        return delta if abs(delta) > 1e-12 else 0.0
+
+    def aplicar(self, estado, movimiento, delta):
+        aplicar_intercambio(estado, self.datos, *movimiento, delta)
+
+    def copiar(self, estado):
+        return [list(e) for e in estado["equipos"]], estado["aptitud"]
+
+def hill_climbing(df, iteraciones=1000, num_equipos=5, modo="aleatorio", **opciones):
+    # El modo empinado no usa el motor: de 'opciones' solo toma rng y telemetria
+    datos = preparar_datos(df, num_equipos)
 
-    for _ in range(iteraciones):
-        vecino = generar_vecino(equipos)
-        aptitud_vecino = calcular_aptitud(vecino, df)
-        if aptitud_vecino < mejor_aptitud:
-            equipos = vecino
-            mejor_aptitud = aptitud_vecino
+    if modo == "empinado":
+        equipos = generar_solucion_inicial(len(df), num_equipos, opciones.get("rng") or random)
+        estado = descenso_empinado(crear_estado(equipos, datos), datos, max_pasos=iteraciones,
+                                   telemetria=opciones.get("telemetria"))
+        return estado["equipos"], recalcular_estado(estado, datos)["aptitud"]
 
-    return equipos, mejor_aptitud
+    (mejores, _), _, _ = buscar(ProblemaEquipos(datos, num_equipos), max_iter=iteraciones, **opciones)
+    # Aptitud final recalculada desde cero, no la suma de deltas
+    return mejores, crear_estado(mejores, datos)["aptitud"]
 
 # Mostrar resultados
 def mostrar_resultados(equipos, df):
@@ -81,7 +252,8 @@ def mostrar_resultados(equipos, df):
             print(f"  {fila['StudentID']} - GPA: {fila['GPA']} - Skill: {fila['Skill']}")
 
 # Ejecutar
-df = cargar_datos()
-equipos, aptitud = hill_climbing(df)
-mostrar_resultados(equipos, df)
-print(f"\n✅ Aptitud final: {aptitud:.4f}")
+if __name__ == "__main__":
+    df = cargar_datos()
+    equipos, aptitud = hill_climbing(df)
+    mostrar_resultados(equipos, df)
+    print(f"\n✅ Aptitud final: {aptitud:.4f}")
@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import Ridge
@@ -6,8 +7,16 @@ from sklearn.metrics import mean_squared_error
 from sklearn.model_selection import train_test_split
 from deap import base, creator, tools
 import random
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetria import Telemetria
+
 def cargar_datos():
     script_dir = os.path.dirname(os.path.abspath(__file__))  # directorio del script
     ruta_csv = os.path.join(script_dir, "HousePricesUNS.csv")  # nombre del archivo csv
@@ -29,6 +38,84 @@ def evaluar_individuo(alpha, X_train, y_train, X_val, y_val):
     rmse = np.sqrt(mean_squared_error(y_val, preds))
     return (rmse,)
 
+def preparar_evaluador(X_train, y_train, X_val, y_val, resolucion=1e-6):
+    # Ridge con intercepto = Ridge sin intercepto sobre datos centrados con la media de entrenamiento.
+    # Con la SVD X_c = U S V^T, los coeficientes son V diag(s / (s^2 + alpha)) U^T y_c.
+    media_X, media_y = X_train.mean(axis=0), y_train.mean()
+    U, s, Vt = np.linalg.svd(X_train - media_X, full_matrices=False)
+    z = U.T @ (y_train - media_y)
+
+    # Residuo de validación: b - M d(alpha), con M = (X_val - media_X) V diag(z)
+    M = ((X_val - media_X) @ Vt.T) * z
+    b = y_val - media_y
+    return {
+        "s2": s ** 2,
+        "s": s,
+        "Mtb": M.T @ b,
+        "MtM": M.T @ M,
+        "bb": b @ b,
+        "n_val": len(y_val),
+        "resolucion": resolucion,
+        "cache": {},
+    }
+
+def rmse_alphas(evaluador, alphas):
+    # RMSE de validación para un vector de alphas, sin reentrenar: O(p^2) por alpha
+    alphas = np.maximum(np.asarray(alphas, dtype=float), 1e-5)
+    d = evaluador["s"] / (evaluador["s2"][np.newaxis, :] + alphas[:, np.newaxis])
+    sse = evaluador["bb"] - 2 * d @ evaluador["Mtb"] + np.einsum("kp,pq,kq->k", d, evaluador["MtM"], d)
+    return np.sqrt(np.maximum(sse, 0.0) / evaluador["n_val"])
+
+def evaluar_poblacion(poblacion, evaluador):
+    # Alphas cuantizados a la resolución del evaluador; solo se calculan los que no están en caché
+    cache, resolucion = evaluador["cache"], evaluador["resolucion"]
+    claves = [int(round(max(ind[0], 1e-5) / resolucion)) for ind in poblacion]
+    faltantes = sorted(set(claves) - cache.keys())
+    if faltantes:
+        for clave, rmse in zip(faltantes, rmse_alphas(evaluador, np.array(faltantes) * resolucion)):
+            cache[clave] = float(rmse)
+    return [(cache[clave],) for clave in claves]
+
+def evaluar_individuo_svd(alpha, evaluador):
+    return evaluar_poblacion([alpha], evaluador)[0]
+
+# --- Evaluación en paralelo con los datos en memoria compartida ---
+_datos_trabajador = {}
+_bloques_trabajador = []
+
+def compartir_arreglos(**arreglos):
+    # Copia cada arreglo a un bloque de memoria compartida; los procesos solo reciben su nombre
+    bloques, descriptores = [], {}
+    for nombre, arreglo in arreglos.items():
+        arreglo = np.ascontiguousarray(arreglo)
+        bloque = shared_memory.SharedMemory(create=True, size=max(arreglo.nbytes, 1))
+        np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=bloque.buf)[...] = arreglo
+        bloques.append(bloque)
+        descriptores[nombre] = (bloque.name, arreglo.shape, arreglo.dtype.str)
+    return bloques, descriptores
+
+def _iniciar_trabajador(descriptores):
+    for nombre, (nombre_bloque, forma, dtype) in descriptores.items():
+        bloque = shared_memory.SharedMemory(name=nombre_bloque)
+        _bloques_trabajador.append(bloque)  # mantener la referencia viva
+        _datos_trabajador[nombre] = np.ndarray(forma, dtype=np.dtype(dtype), buffer=bloque.buf)
+
+def evaluar_individuo_compartido(alpha):
+    return evaluar_individuo(alpha, **_datos_trabajador)
+
+def evaluar_con_map(poblacion, toolbox):
+    # Se envían listas simples: las clases de 'creator' no existen en procesos nuevos
+    return list(toolbox.map(toolbox.evaluate, [list(ind) for ind in poblacion]))
+
+def guardar_convergencia(best_rmse_progress, tiempos_gen, ruta_salida):
+    df = pd.DataFrame({
+        "generacion": range(1, len(best_rmse_progress) + 1),
+        "mejor_rmse": best_rmse_progress,
+        "segundos": tiempos_gen,
+    })
+    df.to_csv(ruta_salida, index=False)
+    print("💾 Curva de convergencia guardada en:", ruta_salida)
+
 def mut_gauss_small(individual):
     sigma = 0.1
     individual[0] += random.gauss(0, sigma)
@@ -36,63 +123,124 @@ def mut_gauss_small(individual):
     individual[0] = min(max(individual[0], 1e-5), 10.0)
     return (individual,)
 
-def main():
-    X, y = cargar_datos()
-
-    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.3, random_state=42)
-
-    creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
-    creator.create("Individual", list, fitness=creator.FitnessMin)
-
-    toolbox = base.Toolbox()
-
-    # Cada individuo tiene un solo valor alpha entre 1e-5 y 10
-    toolbox.register("attr_alpha", random.uniform, 1e-5, 10.0)
-    toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_alpha, 1)
-    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-
-    toolbox.register("evaluate", evaluar_individuo, X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
-    toolbox.register("mutate", mut_gauss_small)
-
+def evolucionar(toolbox, max_gens=100, telemetria=None):
+    # telemetria: objeto Telemetria (ver telemetria.py en la raíz); con None no se mide nada
     pop = toolbox.population(n=20)
 
-    # Evaluar población inicial
-    fitnesses = list(map(toolbox.evaluate, pop))
+    # Evaluar población inicial (toda la población en una sola llamada vectorizada)
+    fitnesses = toolbox.evaluate_population(pop)
     for ind, fit in zip(pop, fitnesses):
         ind.fitness.values = fit
 
-    max_gens = 100
     best_rmse_progress = []
+    tiempos_gen = []
 
     for gen in range(max_gens):
-        new_pop = []
-
+        inicio = time.perf_counter()
+        mutants = []
         for ind in pop:
             mutant = toolbox.clone(ind)
             toolbox.mutate(mutant)
-            mutant.fitness.values = toolbox.evaluate(mutant)
+            mutants.append(mutant)
+        if telemetria is not None:
+            t1 = time.perf_counter()
+            telemetria.vecino(t1 - inicio)
+        for mutant, fit in zip(mutants, toolbox.evaluate_population(mutants)):
+            mutant.fitness.values = fit
+        if telemetria is not None:
+            telemetria.fitness(time.perf_counter() - t1, len(mutants))
 
+        new_pop = []
+        aceptados = 0
+        for ind, mutant in zip(pop, mutants):
             # Selección greedy: elegir al que tenga menor RMSE
             if mutant.fitness.values[0] < ind.fitness.values[0]:
                 new_pop.append(mutant)
+                aceptados += 1
             else:
                 new_pop.append(ind)
 
         pop = new_pop
         best_ind = tools.selBest(pop, 1)[0]
         best_rmse_progress.append(best_ind.fitness.values[0])
+        tiempos_gen.append(time.perf_counter() - inicio)
+        if telemetria is not None:
+            telemetria.iteracion(best_ind.fitness.values[0], best_ind.fitness.values[0], aceptados, len(mutants))
         print(f"Gen {gen+1}: Mejor RMSE = {best_ind.fitness.values[0]:.4f} con alpha={best_ind[0]:.5f}")
 
     best_ind = tools.selBest(pop, 1)[0]
+    return best_rmse_progress, tiempos_gen, best_ind
+
+def crear_toolbox():
+    # Las clases de 'creator' se crean una sola vez por proceso
+    if not hasattr(creator, "FitnessMin"):
+        creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+        creator.create("Individual", list, fitness=creator.FitnessMin)
+
+    toolbox = base.Toolbox()
+
+    # Cada individuo tiene un solo valor alpha entre 1e-5 y 10
+    toolbox.register("attr_alpha", random.uniform, 1e-5, 10.0)
+    toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_alpha, 1)
+    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+    toolbox.register("mutate", mut_gauss_small)
+    return toolbox
+
+def main(paralelo=False, procesos=None, headless=False, salida=None, ruta_telemetria=None):
+    X, y = cargar_datos()
+
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.3, random_state=42)
+
+    toolbox = crear_toolbox()
+
+    bloques, pool = [], None
+    if paralelo:
+        # Ajustes de Ridge repartidos en un pool de procesos; X/y viven en memoria compartida
+        bloques, descriptores = compartir_arreglos(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+        pool = ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador, initargs=(descriptores,))
+        toolbox.register("map", pool.map)
+        toolbox.register("evaluate", evaluar_individuo_compartido)
+        toolbox.register("evaluate_population", evaluar_con_map, toolbox=toolbox)
+    else:
+        # Una sola SVD de X_train: cada alpha se evalúa en forma cerrada, sin ajustar un Ridge nuevo
+        evaluador = preparar_evaluador(X_train, y_train, X_val, y_val)
+        toolbox.register("evaluate", evaluar_individuo_svd, evaluador=evaluador)
+        toolbox.register("evaluate_population", evaluar_poblacion, evaluador=evaluador)
+
+    try:
+        with (Telemetria(ruta_telemetria) if ruta_telemetria else contextlib.nullcontext()) as telemetria:
+            best_rmse_progress, tiempos_gen, best_ind = evolucionar(toolbox, telemetria=telemetria)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        for bloque in bloques:
+            bloque.close()
+            bloque.unlink()
+
     print(f"\nAlpha óptimo: {best_ind[0]:.5f} con RMSE: {best_ind.fitness.values[0]:.4f}")
 
+    if headless:
+        salida = salida or os.path.join(os.path.dirname(os.path.abspath(__file__)), "convergencia.csv")
+        guardar_convergencia(best_rmse_progress, tiempos_gen, salida)
+        plt.switch_backend("Agg")
+
     plt.plot(best_rmse_progress, label='RMSE mínimo por generación')
     plt.xlabel('Generación')
     plt.ylabel('RMSE')
     plt.title('Curva de convergencia Hill Climbing en Ridge Regression')
     plt.legend()
     plt.grid(True)
-    plt.show()
+    if headless:
+        plt.savefig(os.path.splitext(salida)[0] + ".png")
+    else:
+        plt.show()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Búsqueda de alpha para Ridge con Hill Climbing (DEAP)")
+    parser.add_argument("--paralelo", action="store_true", help="ajustar Ridge en un pool de procesos")
+    parser.add_argument("--procesos", type=int, default=None, help="número de procesos del pool")
+    parser.add_argument("--headless", action="store_true", help="guardar la curva en archivo en vez de mostrarla")
+    parser.add_argument("--salida", default=None, help="ruta del CSV de convergencia (modo headless)")
+    parser.add_argument("--telemetria", default=None, help="ruta .csv o .jsonl para la telemetría por generación")
+    args = parser.parse_args()
+    main(args.paralelo, args.procesos, args.headless, args.salida, args.telemetria)
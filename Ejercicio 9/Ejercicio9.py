@@ -1,10 +1,17 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
-import random
-from sklearn.linear_model import LogisticRegression
+import argparse
+import contextlib
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import f1_score
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_local import Problema, buscar
+from telemetria import Telemetria
+
 def cargar_datos():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     ruta_csv = os.path.join(script_dir, "emails.csv")
@@ -39,30 +46,178 @@ def evaluar(individuo, X, y):
 
     return f1_score(y, y_pred),  # DEAP espera tuplas
 
-def mutacion_colina(individuo, sigma=0.05):
-    nuevo = np.array(individuo) + np.random.normal(0, sigma, size=len(individuo))
+# --- Entrenar una sola vez y barrer todos los umbrales ---
+def curva_f1(y_prob, y):
+    # F1 de 'y_prob > umbral' para cada umbral distinto, en una pasada acumulada O(n log n)
+    orden = np.argsort(-y_prob, kind="stable")
+    prob = y_prob[orden]
+    es_spam = y[orden] == 1
+    # Último índice de cada grupo de probabilidades iguales (orden descendente)
+    fin_grupo = np.flatnonzero(np.r_[prob[1:] != prob[:-1], True])
+    tp = np.concatenate([[0], np.cumsum(es_spam)[fin_grupo]])
+    fp = np.concatenate([[0], np.cumsum(~es_spam)[fin_grupo]])
+    fn = es_spam.sum() - tp
+    denominador = 2 * tp + fp + fn
+    f1 = np.divide(2 * tp, denominador, out=np.zeros(len(tp)), where=denominador > 0)
+
+    # f1[k] = F1 marcando como spam los k grupos más probables; umbrales[k] lo reproduce
+    valores = prob[fin_grupo]
+    ultimo = min(0.0, np.nextafter(valores[-1], -np.inf))
+    umbrales = np.r_[valores, ultimo]
+    return {"valores": valores, "f1": f1, "umbrales": umbrales}
+
+def f1_umbral(curva, umbral):
+    # Número de grupos con probabilidad > umbral (búsqueda binaria sobre -valores, ascendente)
+    k = np.searchsorted(-curva["valores"], -umbral, side="left")
+    return float(curva["f1"][k])
+
+def mejor_umbral(curva):
+    k = int(np.argmax(curva["f1"]))
+    return float(curva["umbrales"][k]), float(curva["f1"][k])
+
+def crear_evaluador_cacheado(X, y):
+    # Un solo ajuste; predict_proba queda en caché y cada umbral se evalúa sobre la curva
+    clf = LogisticRegression()
+    clf.fit(X, y)
+    curva = curva_f1(clf.predict_proba(X)[:, 1], y)
+
+    def evaluar_cacheado(individuo, X=None, y=None):
+        return f1_umbral(curva, individuo[0]),  # DEAP espera tuplas
+
+    return evaluar_cacheado, curva
+
+# --- Pipeline por bloques (memoria acotada para archivos más grandes que la RAM) ---
+def leer_bloques(ruta_csv, tamano_bloque=100_000):
+    for bloque in pd.read_csv(ruta_csv, chunksize=tamano_bloque):
+        yield preprocesar_datos(bloque)
+
+def entrenar_streaming(ruta_csv, tamano_bloque=100_000, epocas=1):
+    # Primera pasada: media y desviación para escalar; luego regresión logística con partial_fit
+    escalador = StandardScaler()
+    for X, _ in leer_bloques(ruta_csv, tamano_bloque):
+        escalador.partial_fit(X)
+
+    modelo = SGDClassifier(loss="log_loss", random_state=42)
+    for _ in range(epocas):
+        for X, y in leer_bloques(ruta_csv, tamano_bloque):
+            modelo.partial_fit(escalador.transform(X), y, classes=np.array([0, 1]))
+    return modelo, escalador
+
+def contar_por_umbral(modelo, escalador, ruta_csv, n_umbrales=1000, tamano_bloque=100_000):
+    # Histograma de probabilidades por clase: la cubeta i agrupa prob en ((i-1)/n, i/n]
+    spam = np.zeros(n_umbrales + 1, dtype=np.int64)
+    no_spam = np.zeros(n_umbrales + 1, dtype=np.int64)
+    for X, y in leer_bloques(ruta_csv, tamano_bloque):
+        prob = modelo.predict_proba(escalador.transform(X))[:, 1]
+        cubeta = np.clip(np.ceil(prob * n_umbrales).astype(int), 0, n_umbrales)
+        spam += np.bincount(cubeta[y == 1], minlength=n_umbrales + 1)
+        no_spam += np.bincount(cubeta[y != 1], minlength=n_umbrales + 1)
+    return spam, no_spam
+
+def curva_f1_conteos(spam, no_spam):
+    # Umbral j/n marca como spam las cubetas j+1..n (prob > j/n)
+    n_umbrales = len(spam) - 1
+    tp = np.cumsum(spam[::-1])[::-1][1:]
+    fp = np.cumsum(no_spam[::-1])[::-1][1:]
+    tp, fp = np.r_[tp, 0], np.r_[fp, 0]
+    fn = spam.sum() - tp
+    denominador = 2 * tp + fp + fn
+    f1 = np.divide(2 * tp, denominador, out=np.zeros(len(tp)), where=denominador > 0)
+    return {"umbrales": np.arange(n_umbrales + 1) / n_umbrales, "f1": f1}
+
+def pipeline_streaming(ruta_csv, tamano_bloque=100_000, epocas=1, n_umbrales=1000):
+    modelo, escalador = entrenar_streaming(ruta_csv, tamano_bloque, epocas)
+    spam, no_spam = contar_por_umbral(modelo, escalador, ruta_csv, n_umbrales, tamano_bloque)
+    umbral, f1 = mejor_umbral(curva_f1_conteos(spam, no_spam))
+    if umbral <= 1 / n_umbrales or umbral >= 1 - 1 / n_umbrales:
+        # Umbral en el borde de la rejilla: el modelo casi no separa las clases (p. ej. pocas épocas)
+        print(f"⚠️ Umbral {umbral:.3f} en el borde de la rejilla: el modelo puede estar poco entrenado "
+              f"({epocas} época(s)); prueba con más --epocas.")
+    return umbral, f1, modelo, escalador
+
+def mutacion_colina(individuo, sigma=0.05, rng=None):
+    # Con rng (random.Random del motor) el ruido sale de ese generador; si no, de np.random
+    if rng is not None:
+        ruido = [rng.gauss(0, sigma) for _ in individuo]
+    else:
+        ruido = np.random.normal(0, sigma, size=len(individuo))
+    nuevo = np.array(individuo) + ruido
     nuevo = np.clip(nuevo, 0, 1)  # mantener dentro del rango válido
     return nuevo.tolist()
 
-def hill_climbing(evaluar, X, y, generaciones=50):
-    individuo = [random.uniform(0.3, 0.7)]  # solo umbral
-    mejor_fitness = evaluar(individuo, X, y)[0]
+class ProblemaUmbral(Problema):
+    # Mutar el umbral; el costo es -F1. El fitness del vecino se guarda en el movimiento
+    # para no volver a evaluarlo al aplicarlo.
+    def __init__(self, evaluar, X, y, inicial=None):
+        self.evaluar = evaluar
+        self.X = X
+        self.y = y
+        self.individuo_inicial = inicial
+
+    def inicial(self, rng):
+        # El individuo recibido solo en el primer reinicio; los siguientes parten al azar
+        individuo, self.individuo_inicial = self.individuo_inicial, None
+        if individuo is None:
+            individuo = [rng.uniform(0.3, 0.7)]  # solo umbral
+        return {"individuo": individuo, "fitness": self.evaluar(individuo, self.X, self.y)[0]}
+
+    def costo(self, estado):
+        return -estado["fitness"]
 
-    for _ in range(generaciones):
-        vecino = mutacion_colina(individuo)
-        fitness_vecino = evaluar(vecino, X, y)[0]
+    def proponer(self, estado, rng):
+        return {"individuo": mutacion_colina(estado["individuo"], rng=rng)}
 
-        if fitness_vecino > mejor_fitness:
-            individuo = vecino
-            mejor_fitness = fitness_vecino
+    def delta(self, estado, movimiento):
+        movimiento["fitness"] = self.evaluar(movimiento["individuo"], self.X, self.y)[0]
+        return estado["fitness"] - movimiento["fitness"]
 
-    return individuo, mejor_fitness
+    def aplicar(self, estado, movimiento, delta):
+        estado.update(movimiento)
+
+    def copiar(self, estado):
+        return dict(estado)
+
+def hill_climbing(evaluar, X, y, generaciones=50, inicial=None, **opciones):
+    mejor, _, _ = buscar(ProblemaUmbral(evaluar, X, y, inicial), max_iter=generaciones, **opciones)
+    return mejor["individuo"], mejor["fitness"]
 
 # === MAIN ===
-df = cargar_datos()
-X, y = preprocesar_datos(df)
-mejor_individuo, mejor_f1 = hill_climbing(evaluar, X, y)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Umbral de decisión óptimo para detección de spam")
+    parser.add_argument("--refinar", action="store_true", help="refinar el umbral con hill climbing")
+    parser.add_argument("--streaming", action="store_true", help="entrenar y evaluar leyendo el CSV por bloques")
+    parser.add_argument("--bloque", type=int, default=100_000, help="filas por bloque en modo streaming")
+    parser.add_argument("--epocas", type=int, default=10,
+                        help="pasadas de partial_fit sobre el CSV en modo streaming")
+    parser.add_argument("--telemetria", default=None, help="ruta .csv o .jsonl para la telemetría del refinamiento")
+    args = parser.parse_args()
+    if args.streaming and (args.refinar or args.telemetria):
+        # En streaming el umbral ya es el óptimo exacto de la rejilla de cubetas: no hay curva continua que refinar
+        parser.error("--refinar y --telemetria no se pueden usar con --streaming")
+    if args.epocas < 1:
+        parser.error("--epocas debe ser al menos 1")
+    if args.telemetria and not args.refinar:
+        parser.error("--telemetria requiere --refinar (solo se mide el refinamiento)")
+
+    if args.streaming:
+        ruta_csv = os.path.join(os.path.dirname(os.path.abspath(__file__)), "emails.csv")
+        umbral, mejor_f1, _, _ = pipeline_streaming(ruta_csv, args.bloque, args.epocas)
+        mejor_individuo = [umbral]
+    else:
+        df = cargar_datos()
+        X, y = preprocesar_datos(df)
+
+        # Umbral óptimo exacto sobre la curva F1 (un solo entrenamiento)
+        evaluar_cacheado, curva = crear_evaluador_cacheado(X, y)
+        umbral, mejor_f1 = mejor_umbral(curva)
+        mejor_individuo = [umbral]
+
+        # Refinamiento opcional con hill climbing sobre la misma curva
+        if args.refinar:
+            with (Telemetria(args.telemetria) if args.telemetria else contextlib.nullcontext()) as telemetria:
+                mejor_individuo, mejor_f1 = hill_climbing(evaluar_cacheado, X, y, inicial=mejor_individuo,
+                                                          telemetria=telemetria)
 
-print("\n🏁 Mejor configuración encontrada:")
-print("📏 Umbral de decisión:", round(mejor_individuo[0], 3))
-print("🎯 F1-Score obtenido:", round(mejor_f1, 4))
+    print("\n🏁 Mejor configuración encontrada:")
+    print("📏 Umbral de decisión:", round(mejor_individuo[0], 3))
+    print("🎯 F1-Score obtenido:", round(mejor_f1, 4))
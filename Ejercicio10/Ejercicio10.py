@@ -1,11 +1,26 @@
 import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 import random
+import copy
+import json
+import math
+import hashlib
+import argparse
+import warnings
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.neural_network import MLPClassifier
 from sklearn.metrics import accuracy_score
+from sklearn.exceptions import ConvergenceWarning
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetria import Telemetria
 
 # --- Cargar datos ---
 def cargar_datos():
@@ -24,23 +39,97 @@ def preprocesar(df):
     y_encoded = encoder.fit_transform(y)
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
-    return train_test_split(X_scaled, y_encoded, test_size=0.2, random_state=42), encoder
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_encoded, test_size=0.2, random_state=42)
+    # Arreglos contiguos en float32: menos tráfico de memoria en cada época
+    X_train = np.ascontiguousarray(X_train, dtype=np.float32)
+    X_test = np.ascontiguousarray(X_test, dtype=np.float32)
+    return (X_train, X_test, y_train, y_test), encoder
 
 # --- Crear modelo dinámico con sklearn MLPClassifier ---
-def crear_modelo(n_capas, n_neuronas, lr):
+def crear_modelo(n_capas, n_neuronas, lr, max_iter=20):
     # La estructura oculta es una tupla con n_capas veces n_neuronas
     hidden_layers = tuple([n_neuronas] * n_capas)
-    model = MLPClassifier(hidden_layer_sizes=hidden_layers, learning_rate_init=lr, max_iter=20, random_state=42)
+    model = MLPClassifier(hidden_layer_sizes=hidden_layers, learning_rate_init=lr, max_iter=max_iter, random_state=42)
     return model
 
 # --- Evaluar genotipo ---
-def evaluar(genotipo, X_train, y_train, X_test, y_test):
+def evaluar(genotipo, X_train, y_train, X_test, y_test, max_iter=20):
     n_capas, n_neuronas, lr = genotipo
-    model = crear_modelo(n_capas, n_neuronas, lr)
+    model = crear_modelo(n_capas, n_neuronas, lr, max_iter)
     model.fit(X_train, y_train)
     y_pred = model.predict(X_test)
     return accuracy_score(y_test, y_pred), model
 
+# --- Ajuste fino desde los pesos del padre (misma topología) ---
+def ajustar_desde_padre(modelo_padre, genotipo, X_train, y_train, X_test, y_test, max_iter=5):
+    # Continúa el entrenamiento del padre con el nuevo lr en vez de inicializar pesos al azar
+    modelo = copy.deepcopy(modelo_padre)
+    modelo.set_params(learning_rate_init=genotipo[2], warm_start=True, max_iter=max_iter)
+    modelo.fit(X_train, y_train)
+    return accuracy_score(y_test, modelo.predict(X_test)), modelo
+
+# --- Caché de fitness (LRU en memoria + almacén opcional en disco) ---
+def normalizar_genotipo(genotipo):
+    # Misma clave para genotipos equivalentes (p. ej. lr que cae en los mismos límites)
+    n_capas, n_neuronas, lr = genotipo
+    return (int(n_capas), int(n_neuronas), round(float(lr), 6))
+
+def hash_datos(X_train, y_train, X_test, y_test):
+    # Identifica el dataset y la configuración de entrenamiento
+    h = hashlib.sha256(b"mlp-max_iter=20-random_state=42")
+    for arreglo in (X_train, y_train, X_test, y_test):
+        h.update(np.ascontiguousarray(arreglo).tobytes())
+    return h.hexdigest()[:16]
+
+def crear_cache(X_train, y_train, X_test, y_test, tam_max=128, directorio_disco=None):
+    ruta = None
+    disco = {}
+    if directorio_disco:
+        os.makedirs(directorio_disco, exist_ok=True)
+        ruta = os.path.join(directorio_disco, f"fitness_{hash_datos(X_train, y_train, X_test, y_test)}.json")
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                disco = json.load(f)
+    return {"lru": OrderedDict(), "tam_max": tam_max, "disco": disco, "ruta": ruta, "aciertos": 0, "fallos": 0}
+
+def _guardar_disco(cache):
+    temporal = cache["ruta"] + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(cache["disco"], f)
+    os.replace(temporal, cache["ruta"])
+
+def buscar_en_cache(cache, clave):
+    # Devuelve (fitness, modelo) o None; el modelo es None si el fitness vino del disco
+    lru = cache["lru"]
+    if clave in lru:
+        lru.move_to_end(clave)
+        cache["aciertos"] += 1
+        return lru[clave]
+    clave_disco = json.dumps(clave)
+    if clave_disco in cache["disco"]:
+        cache["aciertos"] += 1
+        return cache["disco"][clave_disco], None
+    return None
+
+def guardar_en_cache(cache, clave, fitness, modelo):
+    cache["fallos"] += 1
+    lru = cache["lru"]
+    lru[clave] = (fitness, modelo)
+    if len(lru) > cache["tam_max"]:
+        lru.popitem(last=False)
+    if cache["ruta"]:
+        cache["disco"][json.dumps(clave)] = float(fitness)
+        _guardar_disco(cache)
+
+def evaluar_con_cache(genotipo, X_train, y_train, X_test, y_test, cache):
+    clave = normalizar_genotipo(genotipo)
+    encontrado = buscar_en_cache(cache, clave)
+    if encontrado is not None:
+        return encontrado
+    fitness, modelo = evaluar(clave, X_train, y_train, X_test, y_test)
+    guardar_en_cache(cache, clave, fitness, modelo)
+    return fitness, modelo
+
 # --- Mutar genotipo ---
 def mutar(genotipo):
     n_capas, n_neuronas, lr = genotipo
@@ -53,27 +142,171 @@ def mutar(genotipo):
     return (n_capas, n_neuronas, lr)
 
 # --- Evolución con hill climbing ---
-def evolucionar(X_train, y_train, X_test, y_test, n_iter=30):
-    mejor_genotipo = (random.randint(1, 3), random.randint(4, 128), round(random.uniform(0.001, 0.05), 4))
-    mejor_fitness, mejor_modelo = evaluar(mejor_genotipo, X_train, y_train, X_test, y_test)
+def evolucionar(X_train, y_train, X_test, y_test, n_iter=30, cache=None, warm_start=True, iter_ajuste=5,
+                telemetria=None):
+    # telemetria: objeto Telemetria (ver telemetria.py en la raíz) con minimizar=False,
+    # porque se maximiza la accuracy; con None no se mide nada
+    if cache is None:
+        cache = crear_cache(X_train, y_train, X_test, y_test)
+    mejor_genotipo = normalizar_genotipo((random.randint(1, 3), random.randint(4, 128), round(random.uniform(0.001, 0.05), 4)))
+    mejor_fitness, mejor_modelo = evaluar_con_cache(mejor_genotipo, X_train, y_train, X_test, y_test, cache)
+    if mejor_modelo is None:
+        _, mejor_modelo = evaluar(mejor_genotipo, X_train, y_train, X_test, y_test)
+    # Mejor resultado entrenado desde cero (reproducible solo con el genotipo) y si el mejor actual
+    # viene de un ajuste fino, cuyo fitness depende de los pesos del padre
+    desde_cero = (mejor_genotipo, mejor_fitness, mejor_modelo)
+    heredado = False
 
     print(f"Iteración 0: fitness={mejor_fitness:.4f}, genotipo={mejor_genotipo}")
 
     for i in range(1, n_iter + 1):
-        nuevo_genotipo = mutar(mejor_genotipo)
-        nuevo_fitness, nuevo_modelo = evaluar(nuevo_genotipo, X_train, y_train, X_test, y_test)
+        if telemetria is not None:
+            t0 = time.perf_counter()
+        nuevo_genotipo = normalizar_genotipo(mutar(mejor_genotipo))
+        if telemetria is not None:
+            t1 = time.perf_counter()
+            telemetria.vecino(t1 - t0)
+        encontrado = buscar_en_cache(cache, nuevo_genotipo)
+        ajuste_fino = False
+        if encontrado is not None:
+            nuevo_fitness, nuevo_modelo = encontrado
+        elif warm_start and nuevo_genotipo[:2] == mejor_genotipo[:2]:
+            ajuste_fino = True
+            # Solo cambió lr: ajuste fino desde mejor_modelo (no se guarda en caché, depende del padre)
+            nuevo_fitness, nuevo_modelo = ajustar_desde_padre(mejor_modelo, nuevo_genotipo, X_train, y_train,
+                                                              X_test, y_test, iter_ajuste)
+        else:
+            nuevo_fitness, nuevo_modelo = evaluar(nuevo_genotipo, X_train, y_train, X_test, y_test)
+            guardar_en_cache(cache, nuevo_genotipo, nuevo_fitness, nuevo_modelo)
 
-        if nuevo_fitness > mejor_fitness:
+        acepta = nuevo_fitness > mejor_fitness
+        if acepta:
+            if nuevo_modelo is None:
+                # Fitness conocido desde el disco: se entrena solo porque pasa a ser el mejor
+                _, nuevo_modelo = evaluar(nuevo_genotipo, X_train, y_train, X_test, y_test)
             mejor_genotipo, mejor_fitness, mejor_modelo = nuevo_genotipo, nuevo_fitness, nuevo_modelo
+            heredado = ajuste_fino
             print(f"🔁 Iteración {i}: NUEVO MEJOR fitness = {mejor_fitness:.4f} con genotipo = {mejor_genotipo}")
+        if not ajuste_fino and nuevo_fitness > desde_cero[1]:
+            desde_cero = (nuevo_genotipo, nuevo_fitness, nuevo_modelo)
+        if telemetria is not None:
+            # Un acierto de caché (LRU o disco) no entrena nada: no cuenta como evaluación
+            telemetria.fitness(time.perf_counter() - t1, 0 if encontrado is not None else 1)
+            telemetria.iteracion(mejor_fitness, nuevo_fitness, int(acepta))
+
+    if heredado:
+        # El mejor salió de un ajuste fino: se reentrena desde cero para reportar un fitness reproducible
+        fitness, modelo = evaluar_con_cache(mejor_genotipo, X_train, y_train, X_test, y_test, cache)
+        print(f"♻️ Reevaluado desde cero: fitness={fitness:.4f} (ajuste fino: {mejor_fitness:.4f})")
+        if fitness > desde_cero[1]:
+            desde_cero = (mejor_genotipo, fitness, modelo)
+        mejor_genotipo, mejor_fitness, mejor_modelo = desde_cero
+    if mejor_modelo is None:
+        _, mejor_modelo = evaluar(mejor_genotipo, X_train, y_train, X_test, y_test)
+
+    return mejor_genotipo, mejor_fitness, mejor_modelo
+
+# --- Población de mutantes en paralelo con successive halving ---
+_datos_trabajador = None
+
+def _iniciar_trabajador(X_train, y_train, X_test, y_test):
+    global _datos_trabajador
+    _datos_trabajador = (X_train, y_train, X_test, y_test)
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)  # presupuestos cortos a propósito
+
+def _entrenar_trabajador(genotipo, max_iter):
+    return evaluar(genotipo, *_datos_trabajador, max_iter=max_iter)
+
+def _entrenar_lote(pool, genotipos, max_iter):
+    futuros = [pool.submit(_entrenar_trabajador, g, max_iter) for g in genotipos]
+    return [f.result() for f in futuros]
+
+def evolucionar_poblacion(X_train, y_train, X_test, y_test, n_iter=10, tam_lote=8,
+                          presupuestos=(5, 10, 20), fraccion=0.5, procesos=None, cache=None, telemetria=None):
+    # Solo el último escalón (max_iter=20) es comparable con la caché y con 'evolucionar'.
+    # telemetria: como en 'evolucionar'; cuenta cada entrenamiento de cada escalón como evaluación
+    if cache is None:
+        cache = crear_cache(X_train, y_train, X_test, y_test)
+    usar_cache = presupuestos[-1] == 20
+
+    mejor_genotipo = normalizar_genotipo((random.randint(1, 3), random.randint(4, 128), round(random.uniform(0.001, 0.05), 4)))
+    if usar_cache:
+        mejor_fitness, mejor_modelo = evaluar_con_cache(mejor_genotipo, X_train, y_train, X_test, y_test, cache)
+    else:
+        mejor_fitness, mejor_modelo = evaluar(mejor_genotipo, X_train, y_train, X_test, y_test, max_iter=presupuestos[-1])
+    if mejor_modelo is None:
+        _, mejor_modelo = evaluar(mejor_genotipo, X_train, y_train, X_test, y_test)
+    print(f"Iteración 0: fitness={mejor_fitness:.4f}, genotipo={mejor_genotipo}")
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                             initargs=(X_train, y_train, X_test, y_test)) as pool:
+        for i in range(1, n_iter + 1):
+            if telemetria is not None:
+                t0 = time.perf_counter()
+            candidatos = list(dict.fromkeys(normalizar_genotipo(mutar(mejor_genotipo)) for _ in range(tam_lote)))
+            propuestos = len(candidatos)
+            if telemetria is not None:
+                t1 = time.perf_counter()
+                telemetria.vecino(t1 - t0)
+            entrenados = 0
+
+            # Escalones intermedios: entrenar con poco presupuesto y promover solo la mejor fracción
+            for presupuesto in presupuestos[:-1]:
+                if len(candidatos) == 1:
+                    break
+                fitness = [f for f, _ in _entrenar_lote(pool, candidatos, presupuesto)]
+                entrenados += len(candidatos)
+                orden = sorted(range(len(candidatos)), key=lambda k: fitness[k], reverse=True)
+                candidatos = [candidatos[k] for k in orden[:max(1, math.ceil(len(candidatos) * fraccion))]]
+
+            # Último escalón: presupuesto completo (usando la caché si ya se entrenó)
+            resultados = {}
+            for g in candidatos:
+                encontrado = buscar_en_cache(cache, g) if usar_cache else None
+                if encontrado is not None:
+                    resultados[g] = encontrado
+            faltantes = [g for g in candidatos if g not in resultados]
+            entrenados += len(faltantes)
+            for g, (fitness, modelo) in zip(faltantes, _entrenar_lote(pool, faltantes, presupuestos[-1])):
+                resultados[g] = (fitness, modelo)
+                if usar_cache:
+                    guardar_en_cache(cache, g, fitness, modelo)
+
+            genotipo = max(candidatos, key=lambda g: resultados[g][0])
+            fitness, modelo = resultados[genotipo]
+            acepta = fitness > mejor_fitness
+            if acepta:
+                if modelo is None:
+                    _, modelo = evaluar(genotipo, X_train, y_train, X_test, y_test)
+                mejor_genotipo, mejor_fitness, mejor_modelo = genotipo, fitness, modelo
+                print(f"🔁 Iteración {i}: NUEVO MEJOR fitness = {mejor_fitness:.4f} con genotipo = {mejor_genotipo}")
+            if telemetria is not None:
+                telemetria.fitness(time.perf_counter() - t1, entrenados)
+                telemetria.iteracion(mejor_fitness, fitness, int(acepta), propuestos)
 
     return mejor_genotipo, mejor_fitness, mejor_modelo
 
 # --- Main ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Búsqueda de arquitectura MLP con hill climbing")
+    parser.add_argument("--lote", type=int, default=0, help="mutantes por iteración en paralelo (0 = uno a la vez)")
+    parser.add_argument("--procesos", type=int, default=None, help="número de procesos del pool")
+    parser.add_argument("--telemetria", default=None, help="ruta .csv o .jsonl para la telemetría por iteración")
+    args = parser.parse_args()
+
     df = cargar_datos()
     (X_train, X_test, y_train, y_test), encoder = preprocesar(df)
-    mejor_genotipo, mejor_fitness, modelo_final = evolucionar(X_train, y_train, X_test, y_test)
+    directorio_cache = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_fitness")
+    cache = crear_cache(X_train, y_train, X_test, y_test, directorio_disco=directorio_cache)
+    with (Telemetria(args.telemetria, minimizar=False) if args.telemetria else contextlib.nullcontext()) as telemetria:
+        if args.lote > 0:
+            mejor_genotipo, mejor_fitness, modelo_final = evolucionar_poblacion(
+                X_train, y_train, X_test, y_test, tam_lote=args.lote, procesos=args.procesos, cache=cache,
+                telemetria=telemetria)
+        else:
+            mejor_genotipo, mejor_fitness, modelo_final = evolucionar(X_train, y_train, X_test, y_test, cache=cache,
+                                                                      telemetria=telemetria)
+    print(f"🗃️ Caché de fitness: {cache['aciertos']} aciertos, {cache['fallos']} entrenamientos")
 
     print("\n✅ Arquitectura final:")
     print(f"- Capas ocultas: {mejor_genotipo[0]}")
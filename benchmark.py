@@ -0,0 +1,314 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import warnings
+import contextlib
+import tracemalloc
+import importlib.util
+import numpy as np
+import pandas as pd
+
+# Benchmark de los diez ejercicios sobre datos sintéticos reproducibles.
+# Cada generador reproduce el esquema del CSV del ejercicio con 'escala' veces sus filas
+# (escala 1 = tamaño del CSV incluido, hasta 10 000). Cada caso llama al punto de entrada
+# existente (hill_climbing / evolucionar) con un presupuesto fijo y reporta en JSON
+# evaluaciones por segundo, memoria pico y objetivo final.
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+ESCALA_MAXIMA = 10_000
+MAX_DENSA = 2000  # Ejercicio 3: por encima, distancias bajo demanda en vez de matriz N x N
+
+def cargar_ejercicio(n):
+    # Las carpetas tienen espacios: se importa el script por ruta
+    carpeta = "Ejercicio10" if n == 10 else f"Ejercicio {n}"
+    ruta = os.path.join(RAIZ, carpeta, f"Ejercicio{n}.py")
+    spec = importlib.util.spec_from_file_location(f"ejercicio{n}", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+@contextlib.contextmanager
+def contar_evaluaciones(objeto, nombre, medir=None):
+    # Reemplaza temporalmente objeto.nombre por una versión que cuenta evaluaciones.
+    # 'medir(resultado, *args)' dice cuántas evaluaciones hizo cada llamada (1 por defecto).
+    original = getattr(objeto, nombre)
+    contador = {"evaluaciones": 0}
+
+    def envoltura(*args, **kwargs):
+        resultado = original(*args, **kwargs)
+        contador["evaluaciones"] += medir(resultado, *args, **kwargs) if medir else 1
+        return resultado
+
+    setattr(objeto, nombre, envoltura)
+    try:
+        yield contador
+    finally:
+        setattr(objeto, nombre, original)
+
+def evaluaciones_motor(resultado, *args, **kwargs):
+    # buscar() devuelve (solucion, costo, estadisticas)
+    return resultado[2]["evaluaciones"]
+
+# --- Generadores sintéticos (mismo esquema que cada CSV) ---
+def generar_notas(modulo, escala, rng):
+    n = 120 * escala
+    df = pd.DataFrame({"StudentID": [f"A{i + 1:06d}" for i in range(n)]})
+    for p in range(1, 4):
+        df[f"Parcial{p}"] = rng.integers(0, 21, size=n)
+    return df
+
+def generar_disponibilidad(modulo, escala, rng):
+    n = 20 * escala
+    disponibilidad = (rng.random((n, 10)) < 0.6).astype(int)
+    # Cada mentor con al menos un bloque de 2 slots seguidos: si no, Ej2 no busca nada
+    inicios = rng.integers(0, 9, size=n)
+    disponibilidad[np.arange(n), inicios] = 1
+    disponibilidad[np.arange(n), inicios + 1] = 1
+    df = pd.DataFrame({"MentorID": [f"M{i + 1:06d}" for i in range(n)]})
+    for s in range(1, 11):
+        df[f"Slot{s}"] = disponibilidad[:, s - 1]
+    return df
+
+def generar_distancias(modulo, escala, rng):
+    n = 10 * escala
+    coordenadas = rng.uniform(0, 150, size=(n, 2))
+    etiquetas = [f"Lab{i + 1}" for i in range(n)]
+    if n > MAX_DENSA:
+        return modulo.DistanciasLazy(coordenadas, etiquetas)
+    diferencia = coordenadas[:, np.newaxis, :] - coordenadas[np.newaxis, :, :]
+    D = np.round(np.sqrt((diferencia ** 2).sum(axis=-1)) * 2) / 2  # medio metro, como el CSV
+    return pd.DataFrame(D, index=etiquetas, columns=etiquetas)
+
+def generar_proyectos(modulo, escala, rng):
+    n = 8 * escala
+    return pd.DataFrame({
+        "ProjectID": [f"P{i + 1}" for i in range(n)],
+        "Cost_Soles": rng.integers(1000, 7000, size=n),
+        "Benefit_Soles": rng.integers(5000, 20000, size=n),
+    })
+
+def generar_tesistas(modulo, escala, rng):
+    n = 15 * escala
+    df = pd.DataFrame({"TesistaID": [f"T{i + 1:06d}" for i in range(n)]})
+    for f in range(1, 7):
+        df[f"F{f}"] = (rng.random(n) < 0.5).astype(int)
+    return df
+
+def generar_preguntas(modulo, escala, rng):
+    n = 30 * escala
+    return pd.DataFrame({
+        "QuestionID": [f"Q{i + 1}" for i in range(n)],
+        "Difficulty": rng.integers(20, 101, size=n),
+        "Time_min": rng.integers(5, 31, size=n),
+    })
+
+def generar_estudiantes(modulo, escala, rng):
+    n = 20 * escala
+    return pd.DataFrame({
+        "StudentID": [f"S{i + 1:06d}" for i in range(n)],
+        "GPA": np.round(rng.uniform(10, 20, size=n), 2),
+        "Skill": rng.choice(["Backend", "Data", "DevOps", "Frontend"], size=n),
+    })
+
+def generar_casas(modulo, escala, rng):
+    n = 150 * escala
+    habitaciones = rng.integers(1, 6, size=n)
+    area = rng.integers(20, 201, size=n)
+    precio = 2000 + 800 * habitaciones + 40 * area + rng.normal(0, 1500, size=n)
+    return pd.DataFrame({"Rooms": habitaciones, "Area_m2": area, "Price_Soles": np.round(precio).astype(int)})
+
+def generar_emails(modulo, escala, rng):
+    n = 100 * escala
+    X = rng.random((n, 5))
+    logit = X @ np.array([3.0, -2.0, 1.5, 0.5, -1.0]) - 1.0
+    df = pd.DataFrame(X, columns=[f"Feature{i}" for i in range(1, 6)])
+    df["Spam"] = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int)
+    return df
+
+def generar_matriculas(modulo, escala, rng):
+    n = 120 * escala
+    creditos = rng.integers(12, 25, size=n)
+    gpa = np.round(rng.uniform(10, 20, size=n), 2)
+    horas = rng.integers(0, 16, size=n)
+    puntaje = gpa + 0.2 * creditos - 0.15 * horas + rng.normal(0, 1, size=n)
+    categoria = np.where(puntaje > 19, "Alta", np.where(puntaje > 15.5, "Media", "Baja"))
+    return pd.DataFrame({"Credits": creditos, "Prev_GPA": gpa, "Extracurricular_hours": horas, "Category": categoria})
+
+# --- Ejecución de cada punto de entrada: devuelve (objetivo, evaluaciones[, campos extra del reporte]) ---
+def ejecutar_ej1(modulo, df, escala, presupuesto):
+    # El hill climbing de offsets no tiene presupuesto: converge o corta a las 100 iteraciones
+    with contar_evaluaciones(modulo, "aptitud_indice", lambda r, *a, **k: np.size(r)) as contador:
+        _, aptitud = modulo.hill_climbing(df)
+    return aptitud, contador["evaluaciones"]
+
+def ejecutar_ej2(modulo, df, escala, presupuesto):
+    datos = modulo.preparar_datos(df, duracion=2)
+    with contar_evaluaciones(modulo, "buscar", evaluaciones_motor) as contador:
+        _, choques = modulo.hill_climbing(datos, max_iter=presupuesto, semilla=0)
+    return choques, contador["evaluaciones"]
+
+def ejecutar_ej3(modulo, matriz, escala, presupuesto):
+    with contar_evaluaciones(modulo, "buscar", evaluaciones_motor) as contador:
+        _, distancia = modulo.hill_climbing(matriz, max_iter=presupuesto, movimientos=("swap", "2opt", "oropt"))
+    return distancia, contador["evaluaciones"]
+
+def ejecutar_ej4(modulo, df, escala, presupuesto):
+    with contar_evaluaciones(modulo, "buscar", evaluaciones_motor) as contador:
+        _, beneficio = modulo.hill_climbing(df["Cost_Soles"].tolist(), df["Benefit_Soles"].tolist(),
+                                            presupuesto=10000 * escala, iteraciones=presupuesto)
+    return beneficio, contador["evaluaciones"]
+
+def ejecutar_ej5(modulo, df, escala, presupuesto):
+    with contar_evaluaciones(modulo, "buscar", evaluaciones_motor) as contador:
+        _, (score, _, _) = modulo.hill_climbing(df, iteraciones=presupuesto)
+    return score, contador["evaluaciones"]
+
+def ejecutar_ej6(modulo, df, escala, presupuesto):
+    # Los límites crecen con el banco de preguntas para conservar la misma proporción factible
+    with contar_evaluaciones(modulo, "buscar", evaluaciones_motor) as contador:
+        _, dificultad = modulo.hill_climbing(df, iteraciones=presupuesto, max_tiempo=90 * escala,
+                                             dif_min=180 * escala, dif_max=200 * escala)
+    return dificultad, contador["evaluaciones"]
+
+def ejecutar_ej7(modulo, df, escala, presupuesto):
+    with contar_evaluaciones(modulo, "buscar", evaluaciones_motor) as contador:
+        _, aptitud = modulo.hill_climbing(df, iteraciones=presupuesto, num_equipos=5 * escala)
+    return float(aptitud), contador["evaluaciones"]
+
+def ejecutar_ej8(modulo, df, escala, presupuesto):
+    X, y = df[["Rooms", "Area_m2"]].values, df["Price_Soles"].values
+    X_train, X_val, y_train, y_val = modulo.train_test_split(X, y, test_size=0.3, random_state=42)
+    evaluador = modulo.preparar_evaluador(X_train, y_train, X_val, y_val)
+    with contar_evaluaciones(modulo, "evaluar_poblacion", lambda r, *a, **k: len(r)) as contador:
+        toolbox = modulo.crear_toolbox()
+        toolbox.register("evaluate", modulo.evaluar_individuo_svd, evaluador=evaluador)
+        toolbox.register("evaluate_population", modulo.evaluar_poblacion, evaluador=evaluador)
+        _, _, mejor = modulo.evolucionar(toolbox, max_gens=presupuesto)
+    return mejor.fitness.values[0], contador["evaluaciones"]
+
+def ejecutar_ej9(modulo, df, escala, presupuesto):
+    X, y = modulo.preprocesar_datos(df)
+    evaluar_cacheado, _ = modulo.crear_evaluador_cacheado(X, y)
+    with contar_evaluaciones(modulo, "buscar", evaluaciones_motor) as contador:
+        _, f1 = modulo.hill_climbing(evaluar_cacheado, X, y, generaciones=presupuesto)
+    return float(f1), contador["evaluaciones"]
+
+def ejecutar_ej10(modulo, df, escala, presupuesto):
+    (X_train, X_test, y_train, y_test), _ = modulo.preprocesar(df)
+    cache = modulo.crear_cache(X_train, y_train, X_test, y_test)
+    with contar_evaluaciones(modulo, "evaluar") as entrenados, \
+            contar_evaluaciones(modulo, "ajustar_desde_padre") as ajustados:
+        _, accuracy, _ = modulo.evolucionar(X_train, y_train, X_test, y_test, n_iter=presupuesto, cache=cache)
+    # Solo cuentan entrenamientos y ajustes finos reales (como la telemetría); los aciertos de caché
+    # se reportan aparte
+    return float(accuracy), entrenados["evaluaciones"] + ajustados["evaluaciones"], \
+        {"aciertos_cache": cache["aciertos"]}
+
+# Ejercicio -> (generador, ejecución, sentido del objetivo, presupuesto por defecto del punto de entrada)
+CASOS = {
+    1: (generar_notas, ejecutar_ej1, "max", None),
+    2: (generar_disponibilidad, ejecutar_ej2, "min", 1000),
+    3: (generar_distancias, ejecutar_ej3, "min", 1000),
+    4: (generar_proyectos, ejecutar_ej4, "max", 1000),
+    5: (generar_tesistas, ejecutar_ej5, "max", 1000),
+    6: (generar_preguntas, ejecutar_ej6, "max", 1000),
+    7: (generar_estudiantes, ejecutar_ej7, "min", 1000),
+    8: (generar_casas, ejecutar_ej8, "min", 100),
+    9: (generar_emails, ejecutar_ej9, "max", 50),
+    10: (generar_matriculas, ejecutar_ej10, "max", 30),
+}
+
+def finito(valor):
+    # JSON estricto (jq, JSON.parse) no admite Infinity/NaN: un valor no finito se reporta como null
+    return valor if valor is None or math.isfinite(valor) else None
+
+def correr(ejecutar, modulo, datos, escala, presupuesto, semilla):
+    random.seed(semilla)
+    np.random.seed(semilla)
+    # Los ejercicios imprimen su progreso: se descarta para no mezclarlo con el JSON
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ejecutar(modulo, datos, escala, presupuesto)
+
+def medir_caso(n, modulo, escala, presupuesto=None, semilla=0, medir_memoria=True):
+    generar, ejecutar, sentido, presupuesto_base = CASOS[n]
+    presupuesto = presupuesto_base if presupuesto is None or presupuesto_base is None else presupuesto
+    datos = generar(modulo, escala, np.random.default_rng(semilla))
+
+    inicio = time.perf_counter()
+    objetivo, evaluaciones, *extra = correr(ejecutar, modulo, datos, escala, presupuesto, semilla)
+    segundos = time.perf_counter() - inicio
+    if evaluaciones == 0:
+        # Un caso que no evalúa nada mediría solo el costo de preparación: mejor fallar
+        raise RuntimeError(f"Ejercicio {n} x{escala}: la corrida no registró evaluaciones")
+
+    # tracemalloc vuelve más lento el código Python: la memoria se mide en una segunda corrida idéntica
+    memoria_pico = None
+    if medir_memoria:
+        tracemalloc.start()
+        try:
+            correr(ejecutar, modulo, datos, escala, presupuesto, semilla)
+            memoria_pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    resultado = {
+        "ejercicio": n,
+        "escala": escala,
+        "filas": len(datos),
+        "presupuesto": presupuesto,
+        "segundos": segundos,
+        "evaluaciones": evaluaciones,
+        "evaluaciones_por_segundo": evaluaciones / segundos if segundos > 0 else None,
+        "memoria_pico_mb": memoria_pico,
+        "objetivo": finito(float(objetivo)),
+        "sentido": sentido,
+    }
+    for campos in extra:
+        resultado.update(campos)
+    return resultado
+
+def main(ejercicios, escalas, presupuesto=None, semilla=0, medir_memoria=True, salida=None):
+    resultados = []
+    for n in ejercicios:
+        try:
+            modulo = cargar_ejercicio(n)
+        except ImportError as error:
+            # Dependencia opcional ausente (sklearn, deap, ...): se reporta y se sigue con el resto
+            resultados.append({"ejercicio": n, "error": str(error)})
+            print(f"⚠️ Ejercicio {n} omitido: {error}", file=sys.stderr)
+            continue
+        for escala in escalas:
+            resultado = medir_caso(n, modulo, escala, presupuesto, semilla, medir_memoria)
+            resultados.append(resultado)
+            print(f"⏱️ Ejercicio {n} x{escala}: {resultado['evaluaciones_por_segundo'] or 0:,.0f} evals/s",
+                  file=sys.stderr)
+
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False, allow_nan=False)
+    if salida:
+        with open(salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+        print("💾 Resultados guardados en:", salida, file=sys.stderr)
+    else:
+        print(texto)
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de los ejercicios sobre datos sintéticos")
+    parser.add_argument("--ejercicios", type=int, nargs="+", default=sorted(CASOS), choices=sorted(CASOS),
+                        help="ejercicios a medir (por defecto todos)")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100],
+                        help=f"múltiplos del tamaño del CSV original (1 a {ESCALA_MAXIMA})")
+    parser.add_argument("--presupuesto", type=int, default=None,
+                        help="iteraciones/generaciones para todos los ejercicios (por defecto las de cada uno)")
+    parser.add_argument("--semilla", type=int, default=0, help="semilla de los datos y de la búsqueda")
+    parser.add_argument("--sin-memoria", action="store_true", help="no medir memoria pico (evita la segunda corrida)")
+    parser.add_argument("--salida", default=None, help="ruta del JSON de resultados (por defecto, salida estándar)")
+    args = parser.parse_args()
+    if any(not 1 <= e <= ESCALA_MAXIMA for e in args.escalas):
+        parser.error(f"las escalas deben estar entre 1 y {ESCALA_MAXIMA}")
+    main(args.ejercicios, args.escalas, args.presupuesto, args.semilla, not args.sin_memoria, args.salida)
@@ -0,0 +1,165 @@
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+# Motor de búsqueda local compartido por los ejercicios.
+# Cada ejercicio define un Problema con evaluación incremental y el motor pone el bucle:
+# presupuestos (iteraciones, evaluaciones, segundos), reinicios, primera/mejor mejora
+# y aceptación por mejora, recocido simulado o búsqueda tabú.
+# Convención: se minimiza el costo; un delta negativo es una mejora.
+# Los ejercicios viven en carpetas con espacios (no son paquetes): cada uno agrega la raíz del
+# repositorio a sys.path antes de importar este módulo o telemetria.py. Los parámetros extra
+# de sus hill_climbing(..., **opciones) se pasan tal cual a buscar().
+
+class Problema(ABC):
+    # Los métodos abstractos son obligatorios: un problema incompleto falla al instanciarse
+    @abstractmethod
+    def inicial(self, rng):
+        # Estado inicial (mutable) de una corrida
+        ...
+
+    @abstractmethod
+    def costo(self, estado):
+        # Costo actual del estado, en O(1) a partir de los totales que mantiene
+        ...
+
+    @abstractmethod
+    def proponer(self, estado, rng):
+        # Un movimiento aleatorio, o None si no hay ninguno posible
+        ...
+
+    @abstractmethod
+    def delta(self, estado, movimiento):
+        # Variación del costo si se aplicara el movimiento, sin modificar el estado
+        ...
+
+    @abstractmethod
+    def aplicar(self, estado, movimiento, delta):
+        # Aplica el movimiento ya evaluado (delta es lo que devolvió self.delta)
+        ...
+
+    @abstractmethod
+    def copiar(self, estado):
+        # Copia de la solución para guardar la mejor encontrada
+        ...
+
+    def vecindario(self, estado):
+        # Opcional: todos los movimientos (para mejor mejora); None = muestrear con proponer
+        return None
+
+    def atributo(self, movimiento):
+        # Lo que queda prohibido en la búsqueda tabú tras aplicar el movimiento
+        return movimiento
+
+
+def buscar(problema, max_iter=1000, max_evaluaciones=None, max_segundos=None, reinicios=1,
+           modo="primera", tam_candidatos=10, aceptacion="mejora", temperatura=1.0, enfriamiento=0.995,
+           tenencia=7, costo_objetivo=None, detener=None, cada=64, rng=None, telemetria=None):
+    # modo: "primera" (un movimiento por iteración) o "mejor" (el mejor de un vecindario)
+    # aceptacion: "mejora", "recocido" o "tabu"
+    # detener: función sin argumentos que devuelve True para cortar la búsqueda (p. ej. evento.is_set);
+    # se consulta, junto con el reloj, cada 'cada' iteraciones
+    # telemetria: objeto Telemetria (ver telemetria.py); con None no se mide nada
+    rng = rng or random
+    medir = telemetria is not None
+    inicio = time.perf_counter()
+    estadisticas = {"iteraciones": 0, "evaluaciones": 0, "aceptados": 0, "reinicios": 0}
+    mejor_solucion, mejor_costo = None, math.inf
+
+    def agotado(revisar_reloj):
+        if max_evaluaciones is not None and estadisticas["evaluaciones"] >= max_evaluaciones:
+            return True
+        if revisar_reloj:
+            if max_segundos is not None and time.perf_counter() - inicio >= max_segundos:
+                return True
+            if detener is not None and detener():
+                return True
+        return False
+
+    for r in range(reinicios):
+        if r > 0 and agotado(True):
+            break
+        estado = problema.inicial(rng)
+        costo = problema.costo(estado)
+        estadisticas["reinicios"] += 1
+        if medir:
+            telemetria.nuevo_reinicio()
+        # Con aceptación por mejora el estado actual siempre es el mejor de la corrida:
+        # basta copiarlo al final. Con recocido/tabú se copia cada vez que mejora.
+        if aceptacion != "mejora" and costo < mejor_costo:
+            mejor_solucion, mejor_costo = problema.copiar(estado), costo
+        t = temperatura
+        tabu = deque(maxlen=tenencia)
+
+        for it in range(max_iter):
+            if costo_objetivo is not None and costo <= costo_objetivo:
+                break
+            if agotado(it % cada == 0):
+                break
+            estadisticas["iteraciones"] += 1
+
+            # Candidatos de esta iteración
+            if medir:
+                t0 = time.perf_counter()
+            if modo == "mejor" or aceptacion == "tabu":
+                movimientos = problema.vecindario(estado)
+                if movimientos is None:
+                    movimientos = [problema.proponer(estado, rng) for _ in range(tam_candidatos)]
+            else:
+                movimientos = [problema.proponer(estado, rng)]
+            if medir:
+                t1 = time.perf_counter()
+                telemetria.vecino(t1 - t0)
+                evaluaciones_antes = estadisticas["evaluaciones"]
+
+            elegido, delta_elegido = None, math.inf
+            for movimiento in movimientos:
+                if movimiento is None:
+                    continue
+                if aceptacion == "tabu" and problema.atributo(movimiento) in tabu:
+                    # Aspiración: un movimiento tabú se permite si da un nuevo mejor global
+                    d = problema.delta(estado, movimiento)
+                    estadisticas["evaluaciones"] += 1
+                    if not costo + d < mejor_costo:
+                        continue
+                else:
+                    d = problema.delta(estado, movimiento)
+                    estadisticas["evaluaciones"] += 1
+                if d != d:  # NaN (p. ej. inf - inf): se trata como no mejora
+                    d = math.inf
+                if elegido is None or d < delta_elegido:
+                    elegido, delta_elegido = movimiento, d
+            if medir:
+                telemetria.fitness(time.perf_counter() - t1, estadisticas["evaluaciones"] - evaluaciones_antes)
+            if elegido is None:
+                if medir:
+                    telemetria.iteracion(min(mejor_costo, costo), costo, 0, 0)
+                continue
+
+            if aceptacion == "tabu":
+                acepta = delta_elegido < math.inf
+            elif aceptacion == "recocido":
+                acepta = delta_elegido < 0 or (
+                    delta_elegido < math.inf and t > 0 and rng.random() < math.exp(-delta_elegido / t))
+                t *= enfriamiento
+            else:
+                acepta = delta_elegido < 0
+
+            if acepta:
+                problema.aplicar(estado, elegido, delta_elegido)
+                costo = problema.costo(estado)
+                estadisticas["aceptados"] += 1
+                if aceptacion == "tabu":
+                    tabu.append(problema.atributo(elegido))
+                if aceptacion != "mejora" and costo < mejor_costo:
+                    mejor_solucion, mejor_costo = problema.copiar(estado), costo
+            if medir:
+                telemetria.iteracion(min(mejor_costo, costo), costo, int(acepta))
+
+        if aceptacion == "mejora" and (mejor_solucion is None or costo < mejor_costo):
+            mejor_solucion, mejor_costo = problema.copiar(estado), costo
+
+    estadisticas["segundos"] = time.perf_counter() - inicio
+    return mejor_solucion, mejor_costo, estadisticas
@@ -0,0 +1,123 @@
+import os
+import csv
+import json
+import math
+import time
+
+# Telemetría de los bucles de búsqueda.
+# Quien busca llama a vecino()/fitness() con el tiempo de cada fase e iteracion() al final de
+# cada paso; cada 'cada' iteraciones se emite un registro hacia una lista en memoria, un archivo
+# (.csv o .jsonl) y/o un callback. Desactivada (telemetria=None) no se toma ningún tiempo.
+
+CAMPOS = ["iteracion", "reinicio", "mejor", "actual", "tasa_aceptacion", "sin_mejora", "evaluaciones",
+          "segundos", "segundos_fitness", "segundos_vecino", "evaluaciones_por_segundo"]
+
+class Telemetria:
+    def __init__(self, ruta=None, callback=None, cada=1, guardar=True, minimizar=True):
+        # minimizar indica cómo compara 'mejor' quien emite (el motor siempre minimiza costo)
+        self.cada = max(1, cada)
+        self.callback = callback
+        self.guardar = guardar
+        self.minimizar = minimizar
+        self.registros = []
+
+        self.inicio = time.perf_counter()
+        self.iteraciones = self.evaluaciones = 0
+        self.propuestos = self.aceptados = 0
+        self.segundos_fitness = self.segundos_vecino = 0.0
+        self.reinicio = 0
+        self.mejor = None
+        self.sin_mejora = 0
+        self._ultima_emitida = None
+
+        self._archivo = self._escritor = None
+        if ruta is not None:
+            self._archivo = open(ruta, "w", newline="", encoding="utf-8")
+            if os.path.splitext(ruta)[1].lower() == ".csv":
+                self._escritor = csv.DictWriter(self._archivo, fieldnames=CAMPOS)
+                self._escritor.writeheader()
+
+    # --- Llamadas desde el bucle de búsqueda ---
+    def vecino(self, segundos):
+        self.segundos_vecino += segundos
+
+    def fitness(self, segundos, evaluaciones=1):
+        self.segundos_fitness += segundos
+        self.evaluaciones += evaluaciones
+
+    def nuevo_reinicio(self):
+        self.reinicio += 1
+
+    def iteracion(self, mejor, actual=None, aceptados=0, propuestos=1):
+        self.iteraciones += 1
+        self.aceptados += aceptados
+        self.propuestos += propuestos
+        if self.mejor is None or (mejor < self.mejor if self.minimizar else mejor > self.mejor):
+            self.mejor = mejor
+            self.sin_mejora = 0
+        else:
+            self.sin_mejora += 1
+        if self.iteraciones % self.cada == 0:
+            self._emitir(self.registro(actual))
+
+    # --- Registros y exportación ---
+    def registro(self, actual=None):
+        segundos = time.perf_counter() - self.inicio
+        return {
+            "iteracion": self.iteraciones,
+            "reinicio": self.reinicio,
+            "mejor": self.mejor,
+            "actual": actual,
+            "tasa_aceptacion": self.aceptados / self.propuestos if self.propuestos else 0.0,
+            "sin_mejora": self.sin_mejora,
+            "evaluaciones": self.evaluaciones,
+            "segundos": segundos,
+            "segundos_fitness": self.segundos_fitness,
+            "segundos_vecino": self.segundos_vecino,
+            "evaluaciones_por_segundo": self.evaluaciones / segundos if segundos > 0 else 0.0,
+        }
+
+    @staticmethod
+    def _a_json(registro):
+        # JSON Lines estricto no admite Infinity/NaN (p. ej. mejor = -inf si el inicio es infactible)
+        return {campo: None if isinstance(valor, float) and not math.isfinite(valor) else valor
+                for campo, valor in registro.items()}
+
+    def _emitir(self, registro):
+        self._ultima_emitida = registro["iteracion"]
+        if self.guardar:
+            self.registros.append(registro)
+        if self.callback is not None:
+            self.callback(registro)
+        if self._escritor is not None:
+            self._escritor.writerow(registro)
+        elif self._archivo is not None:
+            self._archivo.write(json.dumps(self._a_json(registro), default=float, allow_nan=False) + "\n")
+
+    def exportar(self, ruta):
+        # Vuelca los registros guardados en memoria a .csv o .jsonl
+        with open(ruta, "w", newline="", encoding="utf-8") as f:
+            if os.path.splitext(ruta)[1].lower() == ".csv":
+                escritor = csv.DictWriter(f, fieldnames=CAMPOS)
+                escritor.writeheader()
+                escritor.writerows(self.registros)
+            else:
+                for registro in self.registros:
+                    f.write(json.dumps(self._a_json(registro), default=float, allow_nan=False) + "\n")
+
+    # --- Uso con 'with': cierra (y emite el estado final) aunque la búsqueda falle ---
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+        return False
+
+    def cerrar(self):
+        # Emite el estado final si la última iteración no se emitió ya
+        if self.iteraciones and self._ultima_emitida != self.iteraciones:
+            self._emitir(self.registro())
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = self._escritor = None
+        return self.registro()